@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from model_bakery import baker
 from rest_framework.test import APIClient
@@ -6,6 +7,17 @@ from rest_framework.test import APIClient
 from products.models import Product, Collection
 
 
+@pytest.fixture
+def locmem_cache(settings):
+    # tests run with a dummy cache, this swaps in a real one
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     return APIClient()
@@ -0,0 +1,69 @@
+from time import time_ns
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_VERSION_CACHE_KEY = "users:{}:version"
+USER_CACHE_KEY = "users:{}:{}"
+USER_CACHE_TIMEOUT = 60
+
+
+def get_user_version(user_id) -> int:
+    key = USER_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # an evicted version restarts from a unique value, like generations
+        cache.add(key, time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    key = USER_VERSION_CACHE_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the cache. Entries
+    are keyed by the user's version, which is bumped whenever the user is
+    saved or deleted, so deactivation and password changes apply at once.
+    """
+
+    def get_user(self, validated_token: Token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache_key = USER_CACHE_KEY.format(user_id, get_user_version(user_id))
+        user = cache.get(cache_key)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(cache_key, user, timeout=USER_CACHE_TIMEOUT)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,314 @@
+from collections import Counter
+from functools import wraps
+from hashlib import md5
+from time import monotonic, sleep, time_ns
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.local_cache import get_local_cache
+
+GENERATION_CACHE_KEY = "generation:{}"
+
+
+def get_generation_cache_key(model: type[Model]) -> str:
+    return GENERATION_CACHE_KEY.format(model._meta.label_lower)
+
+
+def get_cache_generations(models: list[type[Model]]) -> list[int | None]:
+    """
+    Returns the current generation of each model. Keys embedding these values
+    go stale as soon as any of the models is written to.
+    """
+    keys = [get_generation_cache_key(model) for model in models]
+    local_cache = get_local_cache()
+    generations = {}
+    if local_cache is not None:
+        generations = {key: local_cache.get(key) for key in set(keys)}
+        generations = {
+            key: value for key, value in generations.items() if value is not None
+        }
+
+    fetched = {}
+    if len(generations) < len(set(keys)):
+        fetched = cache.get_many(set(keys) - generations.keys())
+        # an evicted counter restarts from a unique value, never from a value
+        # an older cache entry may still be keyed by
+        missing = set(keys) - generations.keys() - fetched.keys()
+        for key in missing:
+            cache.add(key, time_ns(), timeout=None)
+        if missing:
+            fetched.update(cache.get_many(missing))
+
+    # only the fetched keys are stored, local hits keep their original expiry
+    if local_cache is not None:
+        for key, generation in fetched.items():
+            local_cache.set(key, generation)
+    generations.update(fetched)
+    return [generations.get(key) for key in keys]
+
+
+def bump_cache_generation(*models: type[Model]):
+    # bumped after commit, so a concurrent request can not cache data from
+    # before the write under the new generation
+    def bump():
+        keys = [get_generation_cache_key(model) for model in models]
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time_ns(), timeout=None)
+
+        # other processes drop their local copies of the generations
+        local_cache = get_local_cache()
+        if local_cache is not None:
+            local_cache.publish_invalidation(keys)
+
+    transaction.on_commit(bump)
+
+
+RESPONSE_CACHE_KEY = "responses:{}:{}:{}:{}"
+STALE_RESPONSE_CACHE_KEY = "responses:{}:{}:stale:{}"
+CACHED_RESPONSE_HEADERS = ["ETag"]
+# every write bumps a generation and orphans the entries keyed by the old one,
+# the timeout lets them age out instead of piling up in redis
+RESPONSE_CACHE_TIMEOUT = 24 * 60 * 60
+RESPONSE_LOCK_TIMEOUT = 10
+RESPONSE_LOCK_WAIT = 5
+RESPONSE_LOCK_POLL_INTERVAL = 0.05
+
+RESPONSE_CACHE_METRICS_KEY = "metrics:responses:{}"
+# hits: served from the shared cache, misses: computed by this request,
+# coalesced: waited for another request's result, stale: served the previous
+# entry while another request recomputed it, local_*: in-process cache lookups
+RESPONSE_CACHE_METRICS = [
+    "hits",
+    "misses",
+    "coalesced",
+    "stale",
+    "local_hits",
+    "local_misses",
+]
+LOCAL_CACHE_METRICS_FLUSH_SIZE = 100
+local_cache_metrics = Counter()
+
+
+def get_response_cache_keys(view) -> tuple[str, str]:
+    generations = get_cache_generations(view.cache_dependencies)
+    # the absolute uri covers the query string and the host used in links
+    uri = view.request.build_absolute_uri()
+    digest = md5(uri.encode(), usedforsecurity=False).hexdigest()
+    return (
+        RESPONSE_CACHE_KEY.format(
+            view.basename, view.action, ".".join(map(str, generations)), digest
+        ),
+        STALE_RESPONSE_CACHE_KEY.format(view.basename, view.action, digest),
+    )
+
+
+def get_response_cache_entry(cache_key: str) -> dict | None:
+    # hot entries are kept unpickled in the process, in front of the shared cache
+    local_cache = get_local_cache()
+    if local_cache is not None:
+        entry = local_cache.get(cache_key)
+        increment_local_cache_metric("local_hits" if entry else "local_misses")
+        if entry is not None:
+            return entry
+
+    entry = cache.get(cache_key)
+    if entry is not None:
+        increment_response_cache_metric("hits")
+        if local_cache is not None:
+            local_cache.set(cache_key, entry)
+    return entry
+
+
+def set_response_cache_entries(entries: dict[str, dict]):
+    cache.set_many(entries, timeout=RESPONSE_CACHE_TIMEOUT)
+    local_cache = get_local_cache()
+    if local_cache is not None:
+        for cache_key, entry in entries.items():
+            local_cache.set(cache_key, entry)
+
+
+def acquire_response_lock(cache_key: str) -> str | None:
+    # cache.add() is atomic (SET NX on Redis), so only one request wins
+    token = uuid4().hex
+    if cache.add(f"{cache_key}:lock", token, timeout=RESPONSE_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_response_lock(cache_key: str, token: str):
+    if cache.get(f"{cache_key}:lock") == token:
+        cache.delete(f"{cache_key}:lock")
+
+
+def wait_for_response(cache_key: str) -> dict | None:
+    # the lock holder only stores successful responses, so waiting stops as
+    # soon as it released the lock without an entry
+    lock_key = f"{cache_key}:lock"
+    deadline = monotonic() + RESPONSE_LOCK_WAIT
+    while monotonic() < deadline:
+        sleep(RESPONSE_LOCK_POLL_INTERVAL)
+        values = cache.get_many([cache_key, lock_key])
+        if values.get(cache_key) is not None:
+            return values[cache_key]
+        if lock_key not in values:
+            return None
+    return None
+
+
+def increment_response_cache_metric(name: str, delta: int = 1):
+    key = RESPONSE_CACHE_METRICS_KEY.format(name)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, timeout=None)
+
+
+def increment_local_cache_metric(name: str):
+    # local counters are flushed to the shared cache in batches, so a local
+    # hit does not cost the round trip it saves
+    local_cache_metrics[name] += 1
+    if local_cache_metrics.total() >= LOCAL_CACHE_METRICS_FLUSH_SIZE:
+        for metric, count in local_cache_metrics.items():
+            increment_response_cache_metric(metric, count)
+        local_cache_metrics.clear()
+
+
+def get_response_cache_metrics() -> dict[str, int | float]:
+    keys = {
+        RESPONSE_CACHE_METRICS_KEY.format(name): name for name in RESPONSE_CACHE_METRICS
+    }
+    values = cache.get_many(keys)
+    metrics = {name: values.get(key, 0) for key, name in keys.items()}
+
+    # the shared cache is only asked on local misses, and every lookup it can
+    # not answer ends up computed, coalesced or stale
+    local_lookups = metrics["local_hits"] + metrics["local_misses"]
+    shared_lookups = sum(
+        metrics[name] for name in ["hits", "misses", "coalesced", "stale"]
+    )
+    metrics["local_hit_ratio"] = (
+        metrics["local_hits"] / local_lookups if local_lookups else 0.0
+    )
+    metrics["shared_hit_ratio"] = (
+        metrics["hits"] / shared_lookups if shared_lookups else 0.0
+    )
+    return metrics
+
+
+def get_cached_response(request, entry: dict) -> HttpResponseBase:
+    # validators stored with the entry are as fresh as the entry itself
+    headers = entry["headers"]
+    response = get_conditional_response(request, etag=headers.get("ETag"))
+    if response is None:
+        response = Response(entry["data"])
+    for header, value in headers.items():
+        response.headers[header] = value
+    return response
+
+
+def cache_response(view_method=None, *, serve_stale: bool = False):
+    """
+    Caches successful responses of a viewset action until one of the view's
+    cache_dependencies is written to. The key embeds the models' generations,
+    so a write makes every affected entry unreachable at once and entries
+    never have to expire.
+
+    On a miss only the request holding the lock recomputes the response, the
+    others wait for its result. With serve_stale they get the previous entry
+    for the same url right away instead.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            cache_key, stale_cache_key = get_response_cache_keys(view)
+            entry = get_response_cache_entry(cache_key)
+            if entry is not None:
+                return get_cached_response(request, entry)
+
+            token = acquire_response_lock(cache_key)
+            if token is None:
+                entry = cache.get(stale_cache_key) if serve_stale else None
+                if entry is not None:
+                    increment_response_cache_metric("stale")
+                    return get_cached_response(request, entry)
+
+                entry = wait_for_response(cache_key)
+                if entry is not None:
+                    increment_response_cache_metric("coalesced")
+                    return get_cached_response(request, entry)
+                # the lock holder failed or is too slow, compute without the lock
+
+            increment_response_cache_metric("misses")
+            try:
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    entry = {
+                        "data": response.data,
+                        "headers": {
+                            header: response.headers[header]
+                            for header in CACHED_RESPONSE_HEADERS
+                            if header in response.headers
+                        },
+                    }
+                    set_response_cache_entries(
+                        {cache_key: entry, stale_cache_key: entry}
+                    )
+            finally:
+                if token is not None:
+                    release_response_lock(cache_key, token)
+            return response
+
+        return wrapper
+
+    return decorator(view_method) if view_method is not None else decorator
+
+
+def get_response_etag(view, validators: list) -> str:
+    # generations change on every write to the view's cache_dependencies, the
+    # validators only need to cover what they can not see
+    parts = [
+        view.request.build_absolute_uri(),
+        view.basename,
+        view.action,
+        view.request.accepted_renderer.format,
+        *get_cache_generations(view.cache_dependencies),
+        *validators,
+    ]
+    digest = md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+def conditional_response(view_method):
+    """
+    Answers If-None-Match with 304 Not Modified when the view's cache
+    generations and get_response_validators() still match, without running
+    the action. No Last-Modified is sent, counters are updated without
+    touching any timestamp.
+    """
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        etag = get_response_etag(view, view.get_response_validators())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view_method(view, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response.headers["ETag"] = etag
+        return response
+
+    return wrapper
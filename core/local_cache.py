@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from time import monotonic, sleep
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache in front of the shared cache. Entries expire
+    after `timeout` seconds, and the least recently used ones are evicted once
+    their pickled size exceeds `max_bytes`. Other processes drop keys through
+    invalidation messages published on Redis.
+    """
+
+    def __init__(self, max_bytes: int, timeout: float, redis_url: str | None = None):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.redis_url = redis_url
+
+        self._entries: OrderedDict[str, tuple[object, float, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._listener_pid = None
+        self._redis = None
+
+    def get(self, key: str):
+        self.ensure_listener()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < monotonic():
+                if entry is not None:
+                    self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value):
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, monotonic() + self.timeout, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete_many(self, keys: list[str]):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def get_redis(self) -> redis.Redis | None:
+        if self.redis_url is None:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def publish_invalidation(self, keys: list[str]):
+        self.ensure_listener()
+        self.delete_many(keys)
+        client = self.get_redis()
+        if client is None:
+            return
+        try:
+            client.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+        except redis.RedisError:
+            logger.exception("Could not publish cache invalidation.")
+
+    def ensure_listener(self):
+        # started lazily in every process, gunicorn workers are forked after
+        # the application is loaded and threads do not survive a fork
+        if self.redis_url is None or self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        self._redis = None
+        self.clear()
+        threading.Thread(target=self.listen, daemon=True).start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(self.redis_url).pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    self.delete_many(json.loads(message["data"]))
+            except redis.RedisError:
+                logger.exception("Cache invalidation listener disconnected.")
+            # messages may have been missed while disconnected
+            self.clear()
+            sleep(1)
+
+
+_local_cache = None
+
+
+def get_local_cache() -> LocalCache | None:
+    """
+    Returns the process-wide local cache, or None when settings.LOCAL_CACHE
+    is not configured.
+    """
+    global _local_cache
+    config = getattr(settings, "LOCAL_CACHE", None)
+    if not config:
+        return None
+    if _local_cache is None:
+        _local_cache = LocalCache(
+            max_bytes=config["MAX_BYTES"],
+            timeout=config["TIMEOUT"],
+            redis_url=config.get("REDIS_URL"),
+        )
+    return _local_cache
+
+
+@receiver(setting_changed)
+def reset_local_cache(setting: str, **kwargs):
+    global _local_cache
+    if setting == "LOCAL_CACHE":
+        _local_cache = None
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import read_schema_artifacts, write_schema_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the OpenAPI schema into settings.OPENAPI_SCHEMA_DIR for the "
+        "current CODE_VERSION, unless they are already there. Run it before "
+        "the image is built, see Dockerfile.prod."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true")
+
+    def handle(self, *args, **options):
+        if settings.CODE_VERSION is None:
+            raise CommandError("CODE_VERSION is not set.")
+
+        directory, version = settings.OPENAPI_SCHEMA_DIR, settings.CODE_VERSION
+        if not options["force"] and read_schema_artifacts(directory, version):
+            self.stdout.write(f"OpenAPI schema of {version} is up to date.")
+            return
+
+        self.stdout.write("Building OpenAPI schema...")
+        paths = write_schema_artifacts(directory, version)
+        for path in paths:
+            self.stdout.write(f"{path} written.")
+
+        self.stdout.write("Done!")
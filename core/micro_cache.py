@@ -0,0 +1,87 @@
+from functools import wraps
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+MICRO_CACHE_REQUEST_HEADER = "HTTP_X_MICRO_CACHE"
+SURROGATE_KEY_INDEX = "surrogate:{}"
+
+_redis = None
+
+
+def get_micro_cache_config() -> dict | None:
+    return getattr(settings, "MICRO_CACHE", None) or None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(get_micro_cache_config()["REDIS_URL"])
+    return _redis
+
+
+def is_micro_cacheable(request) -> bool:
+    # nginx marks anonymous requests it is going to cache, clients can not
+    # set the header themselves since nginx overwrites it
+    return (
+        get_micro_cache_config() is not None
+        and request.method in ["GET", "HEAD"]
+        and request.META.get(MICRO_CACHE_REQUEST_HEADER) == "1"
+    )
+
+
+def index_surrogate_keys(keys: list[str], path: str, timeout: int):
+    """
+    Remembers which paths nginx may hold for each surrogate key, for as long
+    as nginx keeps them.
+    """
+    pipeline = get_redis().pipeline(transaction=False)
+    for key in keys:
+        index_key = SURROGATE_KEY_INDEX.format(key)
+        pipeline.sadd(index_key, path)
+        pipeline.expire(index_key, timeout)
+    pipeline.execute()
+
+
+def micro_cache(view_method):
+    """
+    Lets nginx cache the action's 200 and 404 responses for anonymous
+    requests. The response is tagged with the view's get_surrogate_keys(),
+    which purge_surrogate_keys() uses to refresh it after writes.
+    """
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        try:
+            response = view_method(view, request, *args, **kwargs)
+        except (Http404, NotFound) as exc:
+            if not is_micro_cacheable(request):
+                raise
+            # cached too, so a refresh can replace the entry of a deleted object
+            response = view.handle_exception(exc)
+
+        if is_micro_cacheable(request) and response.status_code in [
+            status.HTTP_200_OK,
+            status.HTTP_404_NOT_FOUND,
+        ]:
+            keys = view.get_surrogate_keys(response)
+            timeout = get_micro_cache_config()["TIMEOUT"]
+            index_surrogate_keys(keys, request.get_full_path(), timeout)
+            response["Surrogate-Key"] = " ".join(keys)
+            response["X-Accel-Expires"] = str(timeout)
+        return response
+
+    return wrapper
+
+
+def purge_surrogate_keys(*keys: str):
+    if get_micro_cache_config() is None or not keys:
+        return
+
+    from core.tasks import purge_micro_cache
+
+    transaction.on_commit(lambda: purge_micro_cache.delay(sorted(set(keys))))
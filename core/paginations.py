@@ -1,7 +1,372 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import md5
+from operator import attrgetter
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Field, GeneratedField, Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from core.caching import get_cache_generations
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+    def get_ordering(self, request, queryset: QuerySet, view):
+        if not isinstance(queryset, QuerySet):
+            raise NotFound("Cursor pagination is not supported for this list.")
+
+        # filter backends have already applied the requested ordering, so the
+        # queryset is the source of truth; pk is appended as a stable tie-breaker
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) for field in ordering):
+            raise NotFound("Cursor pagination is not supported for this ordering.")
+
+        unique_fields = {
+            field.name for field in queryset.model._meta.concrete_fields if field.unique
+        }
+        unique_fields.update(["id", "pk"])
+
+        for index, field in enumerate(ordering):
+            if field.lstrip("-") in unique_fields:
+                return ordering[: index + 1]
+
+        descending = bool(ordering) and ordering[-1].startswith("-")
+        return ordering + ["-pk" if descending else "pk"]
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.pk_name = queryset.model._meta.pk.name
+
+        self.cursor = self.decode_cursor(request)
+        position, reverse = self.cursor or (None, False)
+        if position is not None:
+            position = self.parse_position(queryset, position)
+
+        ordering = (
+            [self._reverse_field(field) for field in self.ordering]
+            if reverse
+            else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    @staticmethod
+    def _reverse_field(field: str) -> str:
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def get_ordering_field(queryset: QuerySet, name: str) -> Field:
+        name = name.lstrip("-")
+        if name == "pk":
+            return queryset.model._meta.pk
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+
+        model, field = queryset.model, None
+        for part in name.split("__"):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        if isinstance(field, GeneratedField):
+            return field.output_field
+        return field
+
+    def parse_position(self, queryset: QuerySet, position: list) -> list:
+        # cursors come from clients, so values are parsed like form input;
+        # ordering columns are not nullable and a null would break the keyset
+        try:
+            values = [
+                self.get_ordering_field(queryset, field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def get_keyset_filter(ordering: list[str], position: list) -> Q:
+        # (a, b, pk) > (x, y, z) expanded into a lexicographic comparison that
+        # honours the direction of each field
+        keyset_filter = Q()
+        equal_prefix = Q()
+        for field, value in zip(ordering, position):
+            lookup = "lt" if field.startswith("-") else "gt"
+            field = field.lstrip("-")
+            keyset_filter |= equal_prefix & Q(**{f"{field}__{lookup}": value})
+            equal_prefix &= Q(**{field: value})
+
+        # bound the leading column so the database can start an index range scan
+        field = ordering[0]
+        lookup = "lte" if field.startswith("-") else "gte"
+        return Q(**{f"{field.lstrip('-')}__{lookup}": position[0]}) & keyset_filter
+
+    def get_position(self, instance) -> list:
+        position = []
+        for field in self.ordering:
+            field = field.lstrip("-")
+            if isinstance(instance, dict):
+                # rows of a values() queryset
+                value = instance[self.pk_name if field == "pk" else field]
+            else:
+                value = attrgetter(field.replace("__", "."))(instance)
+            position.append(value if isinstance(value, int | str) else str(value))
+        return position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor((self.get_position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor((self.get_position(self.page[0]), True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = cursor["p"], bool(cursor["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, cursor):
+        position, reverse = cursor
+        data = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        encoded = urlsafe_b64encode(data.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+COUNT_CACHE_KEY = "counts:{}:{}:{}"
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator whose count is cached per query until one of `dependencies` is
+    written to. Unfiltered queries over tables the planner estimates above
+    `estimate_threshold` rows use that estimate instead of counting, which
+    sets `approximate`.
+    """
+
+    count_cache_timeout = 60 * 60
+    estimate_threshold = 100_000
+
+    def __init__(self, *args, dependencies: list | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependencies = dependencies
+
+    def get_count_cache_key(self) -> str | None:
+        if self.dependencies is None:
+            return None
+
+        # ordering and selected columns do not change the count
+        query = self.object_list.order_by().values("pk").query
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        digest = md5(repr((sql, params)).encode(), usedforsecurity=False)
+        generations = get_cache_generations(self.dependencies)
+        return COUNT_CACHE_KEY.format(
+            self.object_list.model._meta.label_lower,
+            ".".join(map(str, generations)),
+            digest.hexdigest(),
+        )
+
+    def get_estimated_count(self) -> int | None:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        if queryset.query.where or queryset.query.distinct:
+            return None
+
+        # reltuples is kept up to date by autovacuum and ANALYZE, it is -1 for
+        # tables that have never been analyzed
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < max(self.estimate_threshold, 0):
+            return None
+        return int(row[0])
+
+    @cached_property
+    def counted(self) -> tuple[bool, int]:
+        cache_key = self.get_count_cache_key()
+        if cache_key is not None:
+            counted = cache.get(cache_key)
+            if counted is not None:
+                return counted
+
+        count = self.get_estimated_count()
+        if count is not None:
+            counted = (True, count)
+        elif isinstance(self.object_list, QuerySet):
+            counted = (False, self.object_list.count())
+        else:
+            counted = (False, len(self.object_list))
+        if cache_key is not None:
+            cache.set(cache_key, counted, timeout=self.count_cache_timeout)
+        return counted
+
+    @property
+    def approximate(self) -> bool:
+        return self.counted[0]
+
+    @property
+    def count(self) -> int:
+        return self.counted[1]
+
+    def page(self, number) -> Page:
+        if not self.approximate:
+            return super().page(number)
+
+        # an estimate may be off either way, so pages past it are not rejected
+        # and the next page is detected by fetching one more row
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        return ApproximatePage(
+            rows[: self.per_page], number, self, has_next=len(rows) > self.per_page
+        )
+
+
+class ApproximatePage(Page):
+    def __init__(self, *args, has_next: bool, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
 
 
 class StandardSizePagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 50
+
+    # clients opt into keyset pagination with ?pagination=cursor
+    pagination_mode_query_param = "pagination"
+    cursor_pagination_class = KeysetPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+        self.count_dependencies = None
+
+    def django_paginator_class(self, queryset, page_size) -> CachedCountPaginator:
+        return CachedCountPaginator(
+            queryset, page_size, dependencies=self.count_dependencies
+        )
+
+    def use_cursor_pagination(self, request) -> bool:
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        return (
+            request.query_params.get(self.pagination_mode_query_param) == "cursor"
+            or cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor_pagination(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        # counts are cached until one of these models is written to
+        self.count_dependencies = getattr(
+            view, "count_cache_dependencies", getattr(view, "cache_dependencies", None)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        response = super().get_paginated_response(data)
+        if self.page.paginator.approximate:
+            # the flag is placed right after count
+            response.data = {
+                "count": self.page.paginator.count,
+                "approximate_count": True,
+            } | response.data
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["approximate_count"] = {
+            "type": "boolean",
+            "description": "Present when count is a planner estimate.",
+        }
+        return response_schema
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.pagination_mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' to switch to keyset pagination.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": self.cursor_pagination_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(
+                    self.cursor_pagination_class.cursor_query_description
+                ),
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,66 @@
+from hashlib import md5
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.http import quote_etag
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+SCHEMA_RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+SCHEMA_VERSION_FILE = "version"
+
+# format -> (content, etag), rendered once per process
+_schema_artifacts: dict[str, tuple[bytes, str]] = {}
+
+
+def render_schema() -> dict[str, bytes]:
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, renderer in SCHEMA_RENDERERS.items()
+    }
+
+
+def write_schema_artifacts(directory: Path, version: str) -> list[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for schema_format, content in render_schema().items():
+        path = directory / f"schema.{schema_format}"
+        path.write_bytes(content)
+        paths.append(path)
+    (directory / SCHEMA_VERSION_FILE).write_text(version)
+    return paths
+
+
+def read_schema_artifacts(directory: Path, version: str) -> dict[str, bytes] | None:
+    # artifacts of another code version are ignored, the schema may differ
+    try:
+        if (directory / SCHEMA_VERSION_FILE).read_text() != version:
+            return None
+        return {
+            schema_format: (directory / f"schema.{schema_format}").read_bytes()
+            for schema_format in SCHEMA_RENDERERS
+        }
+    except FileNotFoundError:
+        return None
+
+
+def get_schema_artifact(schema_format: str) -> tuple[bytes, str]:
+    """
+    Returns the rendered schema and its ETag. The artifacts written at image
+    build time by build_openapi_schema are used when they match CODE_VERSION,
+    otherwise the schema is generated once and kept for the process lifetime.
+    """
+    if schema_format not in _schema_artifacts:
+        contents = None
+        if settings.CODE_VERSION is not None:
+            contents = read_schema_artifacts(
+                settings.OPENAPI_SCHEMA_DIR, settings.CODE_VERSION
+            )
+        if contents is None:
+            contents = render_schema()
+
+        for name, content in contents.items():
+            digest = md5(content, usedforsecurity=False).hexdigest()
+            _schema_artifacts[name] = (content, quote_etag(digest))
+    return _schema_artifacts[schema_format]
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.authentication import bump_user_version
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def bump_user_cache_version(sender, instance, **kwargs):
+    # bumped right away and again after commit, so a request can not cache
+    # the user as it was before the write
+    bump_user_version(instance.pk)
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
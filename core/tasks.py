@@ -0,0 +1,38 @@
+import logging
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from celery import shared_task
+
+from core.micro_cache import SURROGATE_KEY_INDEX, get_micro_cache_config, get_redis
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_micro_cache(keys: list[str]):
+    """
+    Refreshes every nginx entry tagged with one of the surrogate keys. Stock
+    nginx can not delete entries, so each path is requested again with the
+    purge token, which makes nginx bypass and replace its cached copy.
+    """
+    config = get_micro_cache_config()
+    index_keys = [SURROGATE_KEY_INDEX.format(key) for key in keys]
+
+    pipeline = get_redis().pipeline()
+    pipeline.sunion(index_keys)
+    pipeline.delete(*index_keys)
+    paths, _ = pipeline.execute()
+
+    for path in sorted(path.decode() for path in paths):
+        request = Request(
+            config["PURGE_URL"] + path,
+            headers={"X-Cache-Purge": config["PURGE_TOKEN"]},
+        )
+        try:
+            with urlopen(request, timeout=5):
+                pass
+        except URLError as exc:
+            # 404s of deleted objects are expected and refresh the entry too
+            if getattr(exc, "code", None) != 404:
+                logger.warning("Could not purge %s: %s", path, exc)
@@ -0,0 +1,54 @@
+import pytest
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import CachedJWTAuthentication
+from orders.utils import get_customer_id
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    def test_user_is_resolved_from_cache(
+        self, test_user, locmem_cache, django_assert_num_queries
+    ):
+        token = AccessToken.for_user(test_user)
+        CachedJWTAuthentication().get_user(token)
+
+        with django_assert_num_queries(0):
+            user = CachedJWTAuthentication().get_user(token)
+
+        assert user == test_user
+
+    def test_deactivated_user_is_rejected(
+        self, test_user, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        token = AccessToken.for_user(test_user)
+        CachedJWTAuthentication().get_user(token)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.is_active = False
+            test_user.save()
+
+        with pytest.raises(AuthenticationFailed):
+            CachedJWTAuthentication().get_user(token)
+
+    def test_token_authenticates_requests(self, api_client, test_user, locmem_cache):
+        token = AccessToken.for_user(test_user)
+
+        response = api_client.get("/api/orders/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestCustomerId:
+    def test_customer_id_is_cached(
+        self, test_user, locmem_cache, django_assert_num_queries
+    ):
+        customer_id = get_customer_id(test_user.id)
+
+        with django_assert_num_queries(0):
+            assert get_customer_id(test_user.id) == customer_id
+
+        assert customer_id == test_user.customer.id
@@ -0,0 +1,82 @@
+import pytest
+from django.core.cache import caches
+
+from core.caching import get_cache_generations
+from core.local_cache import LocalCache, get_local_cache
+from products.models import Collection, Product
+
+
+class TestLocalCache:
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        local_cache = LocalCache(max_bytes=300, timeout=60)
+        local_cache.set("first", "a" * 100)
+        local_cache.set("second", "b" * 100)
+        local_cache.get("first")
+
+        local_cache.set("third", "c" * 100)
+
+        assert local_cache.get("first") == "a" * 100
+        assert local_cache.get("second") is None
+        assert local_cache.get("third") == "c" * 100
+
+    def test_entries_larger_than_the_cache_are_not_stored(self):
+        local_cache = LocalCache(max_bytes=100, timeout=60)
+
+        local_cache.set("large", "a" * 200)
+
+        assert local_cache.get("large") is None
+
+    def test_entries_expire_after_timeout(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr("core.local_cache.monotonic", lambda: now)
+        local_cache = LocalCache(max_bytes=1000, timeout=5)
+        local_cache.set("key", "value")
+
+        now += 6
+
+        assert local_cache.get("key") is None
+
+    def test_invalidated_entries_are_dropped(self):
+        local_cache = LocalCache(max_bytes=1000, timeout=60)
+        local_cache.set("key", "value")
+
+        local_cache.publish_invalidation(["key"])
+
+        assert local_cache.get("key") is None
+
+
+@pytest.mark.django_db
+class TestTwoTierResponseCache:
+    def test_local_tier_answers_without_shared_cache(
+        self, api_client, product, locmem_cache, settings, monkeypatch
+    ):
+        settings.LOCAL_CACHE = {"MAX_BYTES": 1024 * 1024, "TIMEOUT": 60}
+        api_client.get("/api/products/")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("the shared cache was queried")
+
+        # patched on the backend itself, the proxy would restore the methods
+        # on whichever backend is current at teardown
+        backend = caches["default"]
+        monkeypatch.setattr(backend, "get", fail)
+        monkeypatch.setattr(backend, "get_many", fail)
+        response = api_client.get("/api/products/")
+
+        assert response.data["results"][0]["id"] == product.id
+
+
+@pytest.mark.django_db
+class TestLocalCacheGenerations:
+    def test_only_generations_fetched_from_shared_cache_are_stored(
+        self, locmem_cache, settings, monkeypatch
+    ):
+        settings.LOCAL_CACHE = {"MAX_BYTES": 1024 * 1024, "TIMEOUT": 60}
+        local_cache = get_local_cache()
+        get_cache_generations([Product])
+        stored = []
+        monkeypatch.setattr(local_cache, "set", lambda key, value: stored.append(key))
+
+        get_cache_generations([Product, Collection])
+
+        assert stored == ["generation:products.collection"]
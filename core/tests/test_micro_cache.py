@@ -0,0 +1,112 @@
+import pytest
+import redis
+
+from core import micro_cache
+from core.tasks import purge_micro_cache
+
+
+@pytest.fixture
+def micro_cache_redis(settings, monkeypatch):
+    settings.MICRO_CACHE = {
+        "TIMEOUT": 60,
+        "PURGE_URL": "http://nginx",
+        "PURGE_TOKEN": "token",
+        "REDIS_URL": "redis://redis:6379/15",
+    }
+    monkeypatch.setattr(micro_cache, "_redis", None)
+    client = micro_cache.get_redis()
+    try:
+        client.flushdb()
+    except redis.RedisError:
+        pytest.skip("redis is not available")
+    yield client
+    client.flushdb()
+    monkeypatch.setattr(micro_cache, "_redis", None)
+
+
+@pytest.mark.django_db
+class TestMicroCache:
+    def test_anonymous_responses_are_tagged(
+        self, api_client, product, micro_cache_redis
+    ):
+        response = api_client.get(
+            f"/api/products/{product.slug}/", HTTP_X_MICRO_CACHE="1"
+        )
+
+        keys = response["Surrogate-Key"].split()
+        assert f"product-{product.slug}" in keys
+        assert f"product-{product.id}" in keys
+        assert f"collection-{product.collection_id}" in keys
+        assert response["X-Accel-Expires"] == "60"
+        assert micro_cache_redis.smembers(f"surrogate:product-{product.id}") == {
+            f"/api/products/{product.slug}/".encode()
+        }
+
+    def test_not_found_responses_are_tagged(self, api_client, micro_cache_redis):
+        response = api_client.get("/api/products/missing/", HTTP_X_MICRO_CACHE="1")
+
+        assert response.status_code == 404
+        assert response["Surrogate-Key"] == "product-missing"
+
+    def test_responses_are_not_tagged_without_nginx_header(
+        self, api_client, product, micro_cache_redis
+    ):
+        response = api_client.get("/api/products/")
+
+        assert "Surrogate-Key" not in response
+        assert micro_cache_redis.keys() == []
+
+    def test_responses_are_not_tagged_without_config(self, api_client, product):
+        response = api_client.get("/api/products/", HTTP_X_MICRO_CACHE="1")
+
+        assert "Surrogate-Key" not in response
+
+    def test_purge_refreshes_indexed_paths(self, micro_cache_redis, monkeypatch):
+        micro_cache.index_surrogate_keys(["product-1", "product-list"], "/a/", 60)
+        micro_cache.index_surrogate_keys(["product-list"], "/b/", 60)
+        micro_cache.index_surrogate_keys(["product-2"], "/c/", 60)
+        requests = []
+
+        class Response:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+        def urlopen(request, timeout):
+            requests.append((request.full_url, request.get_header("X-cache-purge")))
+            return Response()
+
+        monkeypatch.setattr("core.tasks.urlopen", urlopen)
+        purge_micro_cache(["product-1", "product-list"])
+
+        assert requests == [("http://nginx/a/", "token"), ("http://nginx/b/", "token")]
+        assert micro_cache_redis.keys("surrogate:product-list") == []
+        assert micro_cache_redis.exists("surrogate:product-2")
+
+    def test_product_write_schedules_purge(
+        self,
+        product,
+        micro_cache_redis,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+    ):
+        purged = []
+        monkeypatch.setattr(
+            "core.tasks.purge_micro_cache.delay", lambda keys: purged.append(keys)
+        )
+        previous_slug = product.slug
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.slug = "new-slug"
+            product.save()
+
+        keys = {key for keys in purged for key in keys}
+        assert {
+            f"product-{product.id}",
+            "product-new-slug",
+            f"product-{previous_slug}",
+            "product-list",
+            f"collection-{product.collection_id}",
+        } <= keys
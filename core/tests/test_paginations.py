@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from model_bakery import baker
+
+from core.paginations import CachedCountPaginator
+from products.models import Collection, Product
+
+
+@pytest.mark.django_db
+class TestCachedCountPaginator:
+    def test_count_is_cached_until_a_write(
+        self, collection, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        queryset = Product.objects.order_by("id")
+        baker.make(Product, collection=collection, _quantity=2)
+        CachedCountPaginator(queryset, 10, dependencies=[Product]).count
+
+        Product.objects.filter(id__in=queryset.values("id")[:1]).delete()
+        cached = CachedCountPaginator(queryset, 10, dependencies=[Product])
+        assert cached.count == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Product, collection=collection, _quantity=2)
+        refreshed = CachedCountPaginator(queryset, 10, dependencies=[Product])
+        assert refreshed.count == 3
+
+    def test_filters_are_counted_separately(self, collection, locmem_cache):
+        baker.make(Product, collection=collection, _quantity=2)
+        queryset = Product.objects.order_by("id")
+        CachedCountPaginator(queryset, 10, dependencies=[Product]).count
+
+        filtered = queryset.filter(collection=collection, inventory__lt=0)
+
+        assert CachedCountPaginator(filtered, 10, dependencies=[Product]).count == 0
+
+    def test_large_unfiltered_tables_use_the_planner_estimate(self, collection):
+        baker.make(Collection, _quantity=3)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE products_collection")
+        paginator = CachedCountPaginator(Collection.objects.order_by("id"), 2)
+        paginator.estimate_threshold = 1
+
+        page = paginator.page(2)
+
+        assert paginator.approximate
+        assert paginator.count == 4
+        assert len(page) == 2
+        assert not page.has_next()
+
+    def test_filtered_queries_are_counted_exactly(self, collection):
+        paginator = CachedCountPaginator(Collection.objects.filter(id=collection.id), 2)
+        paginator.estimate_threshold = 0
+
+        assert paginator.count == 1
+        assert not paginator.approximate
+
+
+@pytest.mark.django_db
+class TestApproximateCountResponse:
+    def test_response_flags_approximate_count(
+        self, api_client, collection, monkeypatch
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE products_collection")
+        monkeypatch.setattr(CachedCountPaginator, "estimate_threshold", 1)
+
+        response = api_client.get("/api/collections/")
+
+        assert response.data["approximate_count"] is True
+
+    def test_exact_count_is_not_flagged(self, api_client, collection):
+        response = api_client.get("/api/collections/")
+
+        assert "approximate_count" not in response.data
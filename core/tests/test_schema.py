@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from core import schema
+
+
+@pytest.fixture(autouse=True)
+def schema_artifacts(monkeypatch):
+    monkeypatch.setattr(schema, "_schema_artifacts", {})
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    settings.CODE_VERSION = "v1"
+    settings.OPENAPI_SCHEMA_DIR = tmp_path
+    return tmp_path
+
+
+class TestStaticSchemaView:
+    def test_schema_is_served_with_etag(self, api_client):
+        response = api_client.get("/schema/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.startswith(b"openapi:")
+        assert response["ETag"]
+
+    def test_json_schema_is_served(self, api_client):
+        response = api_client.get("/schema/?format=json")
+
+        assert response.json()["openapi"]
+
+    def test_matching_etag_returns_304(self, api_client):
+        etag = api_client.get("/schema/")["ETag"]
+
+        response = api_client.get("/schema/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_schema_is_rendered_once(self, api_client, monkeypatch):
+        api_client.get("/schema/")
+        monkeypatch.setattr(schema, "render_schema", pytest.fail)
+
+        response = api_client.get("/schema/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestSchemaArtifacts:
+    def test_build_command_writes_artifacts(self, schema_dir):
+        call_command("build_openapi_schema")
+
+        assert (schema_dir / "schema.yaml").read_bytes().startswith(b"openapi:")
+        assert (schema_dir / "version").read_text() == "v1"
+
+    def test_artifacts_of_current_version_are_served(self, schema_dir, monkeypatch):
+        (schema_dir / "schema.yaml").write_bytes(b"prebuilt")
+        (schema_dir / "schema.json").write_bytes(b"{}")
+        (schema_dir / "version").write_text("v1")
+        monkeypatch.setattr(schema, "render_schema", pytest.fail)
+
+        content, _ = schema.get_schema_artifact("yaml")
+
+        assert content == b"prebuilt"
+
+    def test_artifacts_of_other_versions_are_ignored(self, schema_dir, settings):
+        (schema_dir / "schema.yaml").write_bytes(b"prebuilt")
+        (schema_dir / "schema.json").write_bytes(b"{}")
+        (schema_dir / "version").write_text("v0")
+
+        content, _ = schema.get_schema_artifact("yaml")
+
+        assert content.startswith(b"openapi:")
+
+    def test_build_command_keeps_current_artifacts(self, schema_dir):
+        (schema_dir / "schema.yaml").write_bytes(b"prebuilt")
+        (schema_dir / "schema.json").write_bytes(b"{}")
+        (schema_dir / "version").write_text("v1")
+
+        call_command("build_openapi_schema")
+
+        assert (schema_dir / "schema.yaml").read_bytes() == b"prebuilt"
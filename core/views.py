@@ -1,3 +1,37 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from core.caching import get_response_cache_metrics
+from core.schema import get_schema_artifact
+
+
+class ResponseCacheMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_response_cache_metrics())
+
+
+class StaticSchemaView(SpectacularAPIView):
+    """
+    Serves the OpenAPI schema rendered once per code version instead of
+    introspecting every view on each request.
+    """
+
+    def _get_schema_response(self, request):
+        content, etag = get_schema_artifact(request.accepted_renderer.format)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=request.accepted_media_type)
+            response["Content-Disposition"] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response["ETag"] = etag
+        # clients revalidate, which is answered with 304 until the next deploy
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
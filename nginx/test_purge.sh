@@ -0,0 +1,37 @@
+#!/bin/sh
+# Checks that nginx caches catalog responses and that writes purge them.
+# Run against the production stack:
+#   docker compose -f docker-compose.prod.yml up --build -d
+#   docker compose -f docker-compose.prod.yml exec backend python manage.py seed_db
+#   sh nginx/test_purge.sh
+set -eu
+
+COMPOSE="docker compose -f docker-compose.prod.yml"
+URL="http://localhost:8000/api/collections/1/"
+
+cache_status() {
+    curl -s -o /dev/null -D - "$URL" | tr -d '\r' | sed -n 's/^X-Cache-Status: //Ip'
+}
+
+expect() {
+    if [ "$1" != "$2" ]; then
+        echo "expected $2, got $1" >&2
+        exit 1
+    fi
+}
+
+cache_status > /dev/null
+expect "$(cache_status)" HIT
+
+title="purge test $(date +%s)"
+$COMPOSE exec -T backend python manage.py shell -c "
+from products.models import Collection
+Collection.objects.filter(pk=1).update(title='$title')
+Collection.objects.get(pk=1).save()
+"
+# the purge runs on the celery worker after commit
+sleep 2
+
+expect "$(cache_status)" HIT
+curl -s "$URL" | grep -q "$title" || { echo "stale response after purge" >&2; exit 1; }
+echo "ok"
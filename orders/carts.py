@@ -0,0 +1,192 @@
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import Http404
+
+from products.models import Product
+
+CART_KEY = "carts:{}"
+# hashes without fields do not exist in redis, this one keeps empty carts
+CART_MARKER_FIELD = "_"
+
+# adds to a cart atomically, all or nothing: KEYS[1] is the cart, ARGV[1]
+# the timeout, then product id, quantity and maximum quantity triples.
+# Returns -1 for missing carts, 0 and the product ids that would exceed
+# their maximum, or 1 and the new quantities.
+INCREMENT_ITEMS_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return -1
+end
+local exceeded = {}
+for i = 2, #ARGV, 3 do
+    local quantity = tonumber(redis.call("HGET", KEYS[1], ARGV[i]) or 0)
+    if quantity + tonumber(ARGV[i + 1]) > tonumber(ARGV[i + 2]) then
+        table.insert(exceeded, ARGV[i])
+    end
+end
+if #exceeded > 0 then
+    return {0, unpack(exceeded)}
+end
+local quantities = {1}
+for i = 2, #ARGV, 3 do
+    table.insert(quantities, redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[i + 1]))
+end
+redis.call("EXPIRE", KEYS[1], ARGV[1])
+return quantities
+"""
+
+
+class RedisCartStore:
+    """
+    Keeps active carts as redis hashes of product id -> quantity. A cart
+    expires `timeout` seconds after it was last used, and reaches the
+    database only as an order at checkout.
+    """
+
+    def __init__(self, redis_url: str, timeout: int):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.timeout = timeout
+        self.increment_items_script = self.redis.register_script(INCREMENT_ITEMS_SCRIPT)
+
+    @staticmethod
+    def get_key(cart_id) -> str:
+        # malformed ids are missing carts, like for the database lookup
+        try:
+            return CART_KEY.format(UUID(str(cart_id)))
+        except ValueError:
+            raise Http404("No Cart matches the given query.")
+
+    def create(self) -> UUID:
+        cart_id = uuid4()
+        key = self.get_key(cart_id)
+        self.redis.pipeline().hset(key, CART_MARKER_FIELD, "").expire(
+            key, self.timeout
+        ).execute()
+        return cart_id
+
+    def get_items(self, cart_id) -> dict[int, int]:
+        """
+        Returns the cart's product id -> quantity mapping and extends its
+        lifetime. Raises Http404 for missing carts.
+        """
+        key = self.get_key(cart_id)
+        values, _ = (
+            self.redis.pipeline().hgetall(key).expire(key, self.timeout).execute()
+        )
+        if not values:
+            raise Http404("No Cart matches the given query.")
+        return {
+            int(field): int(quantity)
+            for field, quantity in values.items()
+            if field != CART_MARKER_FIELD
+        }
+
+    def set_item(self, cart_id, product_id: int, quantity: int):
+        key = self.get_key(cart_id)
+        self.redis.pipeline().hset(key, str(product_id), quantity).expire(
+            key, self.timeout
+        ).execute()
+
+    def increment_items(
+        self, cart_id, items: dict[int, int], max_quantities: dict[int, int]
+    ) -> tuple[dict[int, int], list[int]]:
+        """
+        Adds the quantities to the cart's items in one atomic step, unless
+        any item would go above its maximum quantity. Returns the new
+        quantities and the product ids that would exceed their maximum, when
+        nothing was written. Raises Http404 for missing carts.
+        """
+        key = self.get_key(cart_id)
+        product_ids = sorted(items)
+        args = [self.timeout]
+        for product_id in product_ids:
+            args += [product_id, items[product_id], max_quantities[product_id]]
+        result = self.increment_items_script(keys=[key], args=args)
+        if result == -1:
+            raise Http404("No Cart matches the given query.")
+
+        written, *values = result
+        if not written:
+            return {}, sorted(int(product_id) for product_id in values)
+        return dict(zip(product_ids, values)), []
+
+    def increment_item(
+        self, cart_id, product_id: int, quantity: int, max_quantity: int
+    ) -> int | None:
+        # None when the new quantity would go above max_quantity
+        quantities, _ = self.increment_items(
+            cart_id, {product_id: quantity}, {product_id: max_quantity}
+        )
+        return quantities.get(product_id)
+
+    def replace_items(self, cart_id, items: dict[int, int]):
+        # the transaction keeps readers from seeing the cart half replaced
+        key = self.get_key(cart_id)
+        pipeline = self.redis.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping={CART_MARKER_FIELD: "", **items})
+        pipeline.expire(key, self.timeout)
+        pipeline.execute()
+
+    def remove_item(self, cart_id, product_id: int) -> bool:
+        return bool(self.redis.hdel(self.get_key(cart_id), str(product_id)))
+
+    def delete(self, cart_id) -> bool:
+        return bool(self.redis.delete(self.get_key(cart_id)))
+
+
+_cart_store = None
+
+
+def get_cart_store() -> RedisCartStore | None:
+    """
+    Returns the redis cart store, or None when settings.CART_STORE is not
+    configured and carts are kept in the database.
+    """
+    global _cart_store
+    config = getattr(settings, "CART_STORE", None)
+    if not config:
+        return None
+    if _cart_store is None:
+        _cart_store = RedisCartStore(config["REDIS_URL"], config["TIMEOUT"])
+    return _cart_store
+
+
+@receiver(setting_changed)
+def reset_cart_store(setting: str, **kwargs):
+    global _cart_store
+    if setting == "CART_STORE":
+        _cart_store = None
+
+
+class StoredCartItem:
+    """
+    Cart item of a stored cart, shaped like CartItem for its serializers. The
+    product id doubles as the item id.
+    """
+
+    def __init__(self, product: Product, quantity: int):
+        self.id = product.id
+        self.product = product
+        self.quantity = quantity
+        self.total_price = quantity * product.unit_price
+
+
+def get_stored_cart_items(items: dict[int, int]) -> list[StoredCartItem]:
+    # products removed from the catalog drop out of the cart
+    products = Product.objects.only(
+        "id", "title", "slug", "unit_price", "inventory"
+    ).in_bulk(items.keys())
+    return [
+        StoredCartItem(products[product_id], quantity)
+        for product_id, quantity in sorted(items.items())
+        if product_id in products
+    ]
+
+
+def get_cart_total_price(cart_items: list) -> Decimal:
+    return sum((item.total_price for item in cart_items), Decimal(0))
@@ -0,0 +1,152 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_save
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from orders.models import (
+    Cart,
+    CartItem,
+    CustomerAddress,
+    Order,
+    OrderAddress,
+)
+from orders.signals import send_email_to_customer_with_order_confirmation
+from orders.views import OrderViewSet
+from products.models import Collection, Product
+
+USERNAME_PREFIX = "benchmark-customer-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks out carts of generated customers concurrently, all buying the "
+        "same product, and reports orders per second and whether stock was "
+        "oversold. Generated rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=200)
+        parser.add_argument(
+            "--inventory",
+            type=int,
+            default=100,
+            help="Stock of the product, below the number of customers to test "
+            "contention.",
+        )
+        parser.add_argument("--quantity", type=int, default=1)
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        # generated customers get no order confirmation emails
+        post_save.disconnect(
+            send_email_to_customer_with_order_confirmation, sender=Order
+        )
+        try:
+            product, checkouts = self.populate(options)
+            statuses, elapsed = self.benchmark(checkouts, options["concurrency"])
+            self.report(product, statuses, elapsed, options)
+        finally:
+            self.cleanup()
+            post_save.connect(
+                send_email_to_customer_with_order_confirmation, sender=Order
+            )
+
+    def populate(self, options) -> tuple[Product, list]:
+        customers = options["customers"]
+        self.stdout.write(f"Generating {customers} customers with carts...")
+        collection = Collection.objects.create(title="Benchmark collection")
+        product = Product.objects.create(
+            title="Benchmark product",
+            slug="benchmark-product",
+            description="Generated for the checkout benchmark.",
+            unit_price=9.99,
+            inventory=options["inventory"],
+            collection=collection,
+        )
+
+        checkouts = []
+        for i in range(customers):
+            user = get_user_model().objects.create_user(
+                username=f"{USERNAME_PREFIX}{i}",
+                email=f"{USERNAME_PREFIX}{i}@example.com",
+            )
+            user.customer.address = CustomerAddress.objects.create(
+                first_name="Benchmark",
+                last_name=f"Customer {i}",
+                phone_number=f"+4420{i:08d}",
+                street_number="1",
+                street="Benchmark street",
+                postal_code="00-000",
+                city="Benchmark",
+                state="Benchmark",
+                country="Benchmark",
+            )
+            user.customer.save()
+
+            cart = Cart.objects.create()
+            CartItem.objects.create(
+                cart=cart, product=product, quantity=options["quantity"]
+            )
+            checkouts.append((user, cart.id))
+        return product, checkouts
+
+    def benchmark(self, checkouts: list, concurrency: int) -> tuple[Counter, float]:
+        view = OrderViewSet.as_view({"post": "create"})
+        factory = APIRequestFactory()
+
+        def checkout(user_and_cart_id) -> int:
+            user, cart_id = user_and_cart_id
+            request = factory.post(
+                "/api/orders/", {"cart_id": str(cart_id)}, format="json"
+            )
+            force_authenticate(request, user=user)
+            try:
+                return view(request).status_code
+            finally:
+                # each thread has its own connection
+                connection.close()
+
+        self.stdout.write(f"Checking out with {concurrency} concurrent requests...")
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            statuses = Counter(executor.map(checkout, checkouts))
+        return statuses, perf_counter() - start
+
+    def report(self, product: Product, statuses: Counter, elapsed: float, options):
+        orders_count = Order.objects.filter(
+            customer__user__username__startswith=USERNAME_PREFIX
+        ).count()
+        sold = orders_count * options["quantity"]
+        product.refresh_from_db()
+
+        for status, count in sorted(statuses.items()):
+            self.stdout.write(f"{status}: {count}")
+        self.stdout.write(f"Orders per second: {orders_count / elapsed:.1f}")
+        self.stdout.write(f"Remaining inventory: {product.inventory}")
+        self.stdout.write(f"Oversold: {max(sold - options['inventory'], 0)}")
+        self.stdout.write(
+            "Stock consistent: " + str(product.inventory == options["inventory"] - sold)
+        )
+
+    def cleanup(self):
+        self.stdout.write("Removing generated rows...")
+        users = get_user_model().objects.filter(username__startswith=USERNAME_PREFIX)
+        address_ids = list(
+            users.exclude(customer__address=None).values_list(
+                "customer__address", flat=True
+            )
+        )
+        Order.objects.filter(customer__user__in=users).delete()
+        OrderAddress.objects.filter(
+            first_name="Benchmark", last_name__startswith="Customer "
+        ).delete()
+        users.delete()
+        CustomerAddress.objects.filter(id__in=address_ids).delete()
+        Cart.objects.filter(cartitem__product__slug="benchmark-product").delete()
+        Product.objects.filter(slug="benchmark-product").delete()
+        Collection.objects.filter(title="Benchmark collection").delete()
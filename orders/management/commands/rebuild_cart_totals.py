@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders.models import Cart
+from orders.utils import get_drifted_carts, rebuild_cart_total_prices
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates total prices of carts that drifted from the sum of their items."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the number of drifted carts, without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drifted_count = get_drifted_carts(Cart.objects.all()).count()
+            self.stdout.write(f"{drifted_count} carts drifted.")
+            return
+
+        self.stdout.write("Rebuilding cart totals...")
+        with transaction.atomic():
+            updated_count = rebuild_cart_total_prices(Cart.objects.all())
+        self.stdout.write(f"{updated_count} rows updated.")
+
+        self.stdout.write("Done!")
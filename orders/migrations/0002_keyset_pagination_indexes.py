@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer", "status", "id"],
+                name="orders_orde_custome_2a66a2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer", "created_at", "id"],
+                name="orders_orde_custome_f0d82d_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer", "updated_at", "id"],
+                name="orders_orde_custome_bb9374_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer", "total_price", "id"],
+                name="orders_orde_custome_4562fc_idx",
+            ),
+        ),
+    ]
@@ -104,6 +104,12 @@ class Order(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(fields=["customer", "status", "id"]),
+            models.Index(fields=["customer", "created_at", "id"]),
+            models.Index(fields=["customer", "updated_at", "id"]),
+            models.Index(fields=["customer", "total_price", "id"]),
+        ]
         permissions = [
             ("cancel_order", "Can cancel order"),
         ]
@@ -1,7 +1,16 @@
 from django.db import transaction
+from django.http import Http404
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
+from core.caching import bump_cache_generation
+from core.exceptions import Conflict
+from orders.carts import (
+    StoredCartItem,
+    get_cart_store,
+    get_cart_total_price,
+    get_stored_cart_items,
+)
 from orders.models import (
     Customer,
     CustomerAddress,
@@ -11,6 +20,7 @@ from orders.models import (
     OrderAddress,
     OrderItem,
 )
+from orders.utils import add_cart_items, decrement_inventories, replace_cart_items
 from products.models import Product
 from products.serializers import SimpleProductSerializer
 
@@ -54,11 +64,14 @@ class CartItemSerializer(serializers.ModelSerializer):
     product = SimpleProductSerializer(read_only=True)
 
     @staticmethod
-    def validate_quantity_in_stock(quantity: int, product: Product):
+    def raise_quantity_above_stock():
+        raise serializers.ValidationError(
+            "You cannot add more to your cart than is available in stock."
+        )
+
+    def validate_quantity_in_stock(self, quantity: int, product: Product):
         if quantity > product.inventory:
-            raise serializers.ValidationError(
-                "You cannot add more to your cart than is available in stock."
-            )
+            self.raise_quantity_above_stock()
 
 
 class CreateCartItemSerializer(CartItemSerializer):
@@ -69,33 +82,41 @@ class CreateCartItemSerializer(CartItemSerializer):
     product_id = serializers.IntegerField(write_only=True)
 
     @staticmethod
-    def validate_product_id(product_id: int):
-        if not Product.objects.filter(id=product_id).exists():
-            raise serializers.ValidationError("Invalid product id.")
-        return product_id
+    def raise_invalid_product_id():
+        raise serializers.ValidationError({"product_id": ["Invalid product id."]})
 
     def create(self, validated_data):
         cart_id = self.context["view"].kwargs["cart_pk"]
         quantity = validated_data["quantity"]
 
         product_id = validated_data["product_id"]
-        product = Product.objects.only("unit_price", "inventory").get(id=product_id)
-
-        self.validate_quantity_in_stock(quantity, product)
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            product = (
+                Product.objects.only(*SimpleProductSerializer.Meta.fields)
+                .filter(id=product_id)
+                .first()
+            )
+            if product is None:
+                self.raise_invalid_product_id()
 
-        try:
-            # update existing cart item quantity and total_price
-            cart_item = CartItem.objects.get(cart_id=cart_id, product_id=product_id)
-            cart_item.quantity += quantity
-            cart_item.total_price = quantity * cart_item.product.unit_price
-            cart_item.save()
-
-            return cart_item
-        except CartItem.DoesNotExist:
-            total_price = quantity * product.unit_price
-            return CartItem.objects.create(
-                cart_id=cart_id, total_price=total_price, **self.validated_data
+            # checked and incremented in redis, concurrent adds can not both
+            # pass the check or overwrite each other
+            quantity = cart_store.increment_item(
+                cart_id, product_id, quantity, product.inventory
             )
+            if quantity is None:
+                self.raise_quantity_above_stock()
+            return StoredCartItem(product, quantity)
+
+        cart_items = add_cart_items(cart_id, {product_id: quantity})
+        if cart_items:
+            return cart_items[0]
+
+        # nothing was written, find out why only on this rare path
+        if not Product.objects.filter(id=product_id).exists():
+            self.raise_invalid_product_id()
+        self.raise_quantity_above_stock()
 
     def to_representation(self, instance: CartItem):
         return CartItemSerializer(context=self.context).to_representation(instance)
@@ -114,9 +135,16 @@ class UpdateCartItemSerializer(CartItemSerializer):
         product = instance.product
         self.validate_quantity_in_stock(quantity, product)
 
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            cart_id = self.context["view"].kwargs["cart_pk"]
+            cart_store.set_item(cart_id, product.id, quantity)
+            return StoredCartItem(product, quantity)
+
         instance.quantity = quantity
         instance.total_price = quantity * product.unit_price
-        instance.save()
+        with transaction.atomic():
+            instance.save()
 
         return instance
 
@@ -124,6 +152,141 @@ class UpdateCartItemSerializer(CartItemSerializer):
         return CartItemSerializer(context=self.context).to_representation(instance)
 
 
+class CartItemQuantitySerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BulkCartItemSerializer(serializers.Serializer):
+    """
+    Writes many cart items at once, given as a list of product_id and
+    quantity pairs. Items of the same product are merged. Nothing is written
+    unless every product exists and has the stock for its item.
+    """
+
+    max_items = 100
+
+    items = CartItemQuantitySerializer(many=True, max_length=max_items)
+
+    def get_quantities(self) -> dict[int, int]:
+        quantities = {}
+        for item in self.validated_data["items"]:
+            product_id = item["product_id"]
+            quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+        return quantities
+
+    @staticmethod
+    def raise_unavailable_products(invalid_ids: list[int], out_of_stock_ids: list[int]):
+        if invalid_ids:
+            ids = ", ".join(map(str, invalid_ids))
+            raise serializers.ValidationError(
+                {"items": [f"Invalid product ids: {ids}."]}
+            )
+        if out_of_stock_ids:
+            ids = ", ".join(map(str, out_of_stock_ids))
+            raise serializers.ValidationError(
+                {
+                    "items": [
+                        "You cannot add more to your cart than is available in "
+                        f"stock of products: {ids}."
+                    ]
+                }
+            )
+
+    def validate_quantities_in_stock(
+        self, quantities: dict[int, int], products: dict[int, Product]
+    ):
+        self.raise_unavailable_products(
+            [product_id for product_id in quantities if product_id not in products],
+            [
+                product_id
+                for product_id, quantity in quantities.items()
+                if product_id in products and quantity > products[product_id].inventory
+            ],
+        )
+
+    def validate_written_items(
+        self, quantities: dict[int, int], cart_items: list[CartItem]
+    ):
+        # skipped products are looked up only on this rare path, raising here
+        # rolls the partial write back
+        skipped_ids = sorted(
+            quantities.keys() - {item.product.id for item in cart_items}
+        )
+        if not skipped_ids:
+            return
+        existing_ids = set(
+            Product.objects.filter(id__in=skipped_ids).values_list("id", flat=True)
+        )
+        self.raise_unavailable_products(
+            [
+                product_id
+                for product_id in skipped_ids
+                if product_id not in existing_ids
+            ],
+            [product_id for product_id in skipped_ids if product_id in existing_ids],
+        )
+
+    @staticmethod
+    def get_stored_products(quantities: dict[int, int]) -> dict[int, Product]:
+        return Product.objects.only(*SimpleProductSerializer.Meta.fields).in_bulk(
+            quantities.keys()
+        )
+
+    def add(self, cart_id) -> list:
+        quantities = self.get_quantities()
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            products = self.get_stored_products(quantities)
+            self.validate_quantities_in_stock(quantities, products)
+
+            # the stock is checked again against the cart inside redis
+            quantities, out_of_stock_ids = cart_store.increment_items(
+                cart_id,
+                quantities,
+                {
+                    product_id: product.inventory
+                    for product_id, product in products.items()
+                },
+            )
+            self.raise_unavailable_products([], out_of_stock_ids)
+            return [
+                StoredCartItem(products[product_id], quantity)
+                for product_id, quantity in sorted(quantities.items())
+            ]
+
+        with transaction.atomic():
+            cart_items = add_cart_items(cart_id, quantities)
+            self.validate_written_items(quantities, cart_items)
+        return cart_items
+
+    def replace(self, cart_id) -> list:
+        quantities = self.get_quantities()
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            products = self.get_stored_products(quantities)
+            self.validate_quantities_in_stock(quantities, products)
+
+            cart_store.replace_items(cart_id, quantities)
+            return [
+                StoredCartItem(products[product_id], quantity)
+                for product_id, quantity in sorted(quantities.items())
+            ]
+
+        with transaction.atomic():
+            cart_items = replace_cart_items(cart_id, quantities)
+            self.validate_written_items(quantities, cart_items)
+        return cart_items
+
+    @staticmethod
+    def clear(cart_id):
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            cart_store.replace_items(cart_id, {})
+        else:
+            replace_cart_items(cart_id, {})
+
+
 class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
@@ -133,6 +296,19 @@ class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(read_only=True, many=True, source="cartitem_set")
 
 
+class StoredCartSerializer(serializers.Serializer):
+    """
+    Renders carts of the redis cart store, given as dicts of id, items and
+    total_price, the same way CartSerializer renders database carts.
+    """
+
+    id = serializers.UUIDField(read_only=True)
+    items = CartItemSerializer(read_only=True, many=True)
+    total_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+
+
 class OrderAddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderAddress
@@ -187,12 +363,46 @@ class CreateOrderSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def validate_cart_id(cart_id):
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            try:
+                items = cart_store.get_items(cart_id)
+            except Http404:
+                raise serializers.ValidationError(
+                    "No cart with the given id was found."
+                )
+            if not items:
+                raise serializers.ValidationError("The cart is empty.")
+            return cart_id
+
         if not Cart.objects.filter(id=cart_id).exists():
             raise serializers.ValidationError("No cart with the given id was found.")
         if CartItem.objects.filter(cart_id=cart_id).count() == 0:
             raise serializers.ValidationError("The cart is empty.")
         return cart_id
 
+    @staticmethod
+    def decrement_inventories(cart_items: list):
+        """
+        Takes the cart out of stock with one conditional update, before any
+        order row is written. Raises Conflict listing the products that are
+        out of stock, which rolls the checkout back.
+        """
+        quantities = {item.product.id: item.quantity for item in cart_items}
+        decremented_ids = decrement_inventories(quantities)
+        out_of_stock = [
+            f"{item.product.title} (id {item.product.id})"
+            for item in cart_items
+            if item.product.id not in decremented_ids
+        ]
+        if out_of_stock:
+            raise Conflict(
+                "Not enough products in stock to place the order: "
+                f"{', '.join(out_of_stock)}."
+            )
+        # cached catalog responses show inventory
+        bump_cache_generation(Product)
+
     def create(self, validated_data):
         with transaction.atomic():
             user = self.context["request"].user
@@ -206,10 +416,19 @@ class CreateOrderSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Customer has no address.")
 
             cart_id = validated_data["cart_id"]
-            cart = Cart.objects.prefetch_related("cartitem_set__product").get(
-                id=cart_id
-            )
-            cart_items = cart.cartitem_set.all()
+            cart_store = get_cart_store()
+            if cart_store is not None:
+                # stored carts are priced at checkout and never reach the database
+                cart_items = get_stored_cart_items(cart_store.get_items(cart_id))
+                total_price = get_cart_total_price(cart_items)
+            else:
+                cart = Cart.objects.prefetch_related("cartitem_set__product").get(
+                    id=cart_id
+                )
+                cart_items = cart.cartitem_set.all()
+                total_price = cart.total_price
+
+            self.decrement_inventories(cart_items)
 
             serialized_customer_address = CustomerAddressSerializer(
                 customer.address
@@ -219,28 +438,22 @@ class CreateOrderSerializer(serializers.ModelSerializer):
             )
 
             order = Order.objects.create(
-                customer=customer, address=order_address, total_price=cart.total_price
+                customer=customer, address=order_address, total_price=total_price
             )
-
-            products = []
-            order_items = []
-            for item in cart_items:
-                item.product.inventory -= item.quantity
-                products.append(item.product)
-
-                order_items.append(
-                    OrderItem(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        total_price=item.total_price,
-                    )
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    quantity=item.quantity,
+                    total_price=item.total_price,
                 )
+                for item in cart_items
+            )
 
-            Product.objects.bulk_update(products, ["inventory"])
-            OrderItem.objects.bulk_create(order_items)
-
-            cart.delete()
+            if cart_store is not None:
+                transaction.on_commit(lambda: cart_store.delete(cart_id))
+            else:
+                cart.delete()
 
             return order
 
@@ -1,10 +1,14 @@
 from django.conf import settings
-from django.db.models import Sum
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet, Sum
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
 
+from core.caching import bump_cache_generation
 from orders.models import Customer, CartItem, OrderItem, Order, Cart
 from orders.tasks import send_order_confirmation_email
+from orders.utils import CUSTOMER_ID_CACHE_KEY, update_cart_total_price
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -13,11 +17,39 @@ def create_customer_for_new_user(sender, instance, created: bool, **kwargs):
         Customer.objects.create(user=instance)
 
 
+def lock_cart_item_values(instance: CartItem) -> dict | None:
+    # the row stays locked until the transaction ends, so concurrent writes
+    # of the item apply their deltas to the cart total one after the other.
+    # Outside a transaction the lock would be released at once.
+    queryset = CartItem.objects.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        queryset = queryset.select_for_update()
+    return queryset.values("total_price").first()
+
+
+def is_deleted_with_cart(origin) -> bool:
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is Cart
+
+
 @receiver([pre_save], sender=CartItem)
 def calculate_cart_item_total_price(sender, instance: CartItem, **kwargs):
+    instance._previous_values = (
+        lock_cart_item_values(instance) if instance.pk is not None else None
+    )
     instance.total_price = instance.quantity * instance.product.unit_price
 
 
+@receiver(pre_delete, sender=CartItem)
+def lock_cart_item_on_delete(sender, instance: CartItem, **kwargs):
+    # the total may have changed since the instance was loaded, an item
+    # deleted concurrently is gone and takes nothing off the total
+    if is_deleted_with_cart(kwargs.get("origin")):
+        return
+    values = lock_cart_item_values(instance)
+    instance.total_price = values["total_price"] if values is not None else 0
+
+
 @receiver([pre_save], sender=OrderItem)
 def calculate_order_item_total_price(sender, instance: OrderItem, **kwargs):
     old_order_item: OrderItem | None = OrderItem.objects.filter(id=instance.id).first()
@@ -31,22 +63,20 @@ def calculate_order_item_total_price(sender, instance: OrderItem, **kwargs):
     instance.total_price = instance.quantity * product.unit_price
 
 
-@receiver([post_save, post_delete], sender=CartItem)
-def update_cart_total_price(sender, instance: CartItem, **kwargs):
-    origin = kwargs.get("origin")
+@receiver(post_save, sender=CartItem)
+def update_cart_total_price_on_save(sender, instance: CartItem, **kwargs):
+    previous_values = getattr(instance, "_previous_values", None)
+    previous_total_price = (previous_values or {}).get("total_price", 0)
+    update_cart_total_price(
+        instance.cart_id, instance.total_price - previous_total_price
+    )
 
-    # update total price if model is saved or directly deleted
-    model_save = origin is None
-    direct_model_delete = isinstance(origin, OrderItem)
-    if model_save or direct_model_delete:
-        cart_id = instance.cart_id
-        new_total_price = (
-            CartItem.objects.filter(cart_id=cart_id)
-            .aggregate(Sum("total_price"))
-            .get("total_price__sum")
-            or 0
-        )
-        Cart.objects.filter(id=cart_id).update(total_price=new_total_price)
+
+@receiver(post_delete, sender=CartItem)
+def update_cart_total_price_on_delete(sender, instance: CartItem, **kwargs):
+    # items deleted along with their cart leave no total to update
+    if not is_deleted_with_cart(kwargs.get("origin")):
+        update_cart_total_price(instance.cart_id, -instance.total_price)
 
 
 @receiver([post_save, post_delete], sender=OrderItem)
@@ -79,3 +109,14 @@ def send_email_to_customer_with_order_confirmation(
             instance.customer.user.email,
         )
         send_order_confirmation_email.delay(order_id, username, user_email)
+
+
+@receiver([post_save, post_delete], sender=Order)
+def bump_order_cache_generation(sender, **kwargs):
+    # cached order list counts are keyed by this generation
+    bump_cache_generation(Order)
+
+
+@receiver(post_delete, sender=Customer)
+def forget_customer_id(sender, instance: Customer, **kwargs):
+    cache.delete(CUSTOMER_ID_CACHE_KEY.format(instance.user_id))
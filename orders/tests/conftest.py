@@ -1,6 +1,8 @@
 import pytest
+import redis
 from model_bakery import baker
 
+from orders.carts import get_cart_store
 from orders.models import CustomerAddress, Customer, Cart, CartItem, Order, OrderAddress
 from orders.serializers import CustomerAddressSerializer
 
@@ -23,6 +25,23 @@ def cart() -> Cart:
     return cart
 
 
+@pytest.fixture
+def cart_store(settings):
+    settings.CART_STORE = {"REDIS_URL": "redis://redis:6379/15", "TIMEOUT": 60}
+    cart_store = get_cart_store()
+    try:
+        cart_store.redis.flushdb()
+    except redis.RedisError:
+        pytest.skip("redis is not available")
+    yield cart_store
+    cart_store.redis.flushdb()
+
+
+@pytest.fixture
+def stored_cart_id(api_client, cart_store) -> str:
+    return api_client.post("/api/carts/").data["id"]
+
+
 @pytest.fixture
 def create_cart_item():
     def do_create_cart_item(cart: Cart, item_quantity: int = 1) -> CartItem:
@@ -0,0 +1,215 @@
+from uuid import uuid4
+
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from orders.models import Cart, CartItem
+from products.models import Product
+
+
+@pytest.fixture
+def products(collection) -> list[Product]:
+    return baker.make(Product, collection=collection, inventory=10, _quantity=3)
+
+
+def get_payload(*pairs) -> dict:
+    return {
+        "items": [
+            {"product_id": product_id, "quantity": quantity}
+            for product_id, quantity in pairs
+        ]
+    }
+
+
+def get_items_total_price(cart: Cart):
+    return sum(item.total_price for item in CartItem.objects.filter(cart=cart))
+
+
+@pytest.mark.django_db
+class TestBulkCreateCartItems:
+    def test_if_cart_does_not_exist_returns_404(self, api_client):
+        response = api_client.post(f"/api/carts/{uuid4()}/items/bulk/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_items_are_added_in_one_statement(
+        self, api_client, cart, products, django_assert_num_queries
+    ):
+        payload = get_payload(*[(product.id, 2) for product in products])
+
+        # the cart lookup and the upsert, in a savepoint as tests run in a
+        # transaction
+        with django_assert_num_queries(4):
+            response = api_client.post(
+                f"/api/carts/{cart.id}/items/bulk/", payload, format="json"
+            )
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [item["quantity"] for item in response.data] == [2, 2, 2]
+        assert CartItem.objects.filter(cart=cart).count() == 3
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_existing_items_and_duplicates_are_merged(self, api_client, cart, products):
+        url = f"/api/carts/{cart.id}/items/"
+        api_client.post(url, {"product_id": products[0].id, "quantity": 1})
+
+        response = api_client.post(
+            f"{url}bulk/",
+            get_payload((products[0].id, 1), (products[0].id, 2)),
+            format="json",
+        )
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert CartItem.objects.get(cart=cart).quantity == 4
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_if_any_product_is_invalid_nothing_is_written(
+        self, api_client, cart, products
+    ):
+        response = api_client.post(
+            f"/api/carts/{cart.id}/items/bulk/",
+            get_payload((products[0].id, 1), (0, 1)),
+            format="json",
+        )
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["items"] == ["Invalid product ids: 0."]
+        assert not CartItem.objects.exists()
+        assert cart.total_price == 0
+
+    def test_if_any_product_is_out_of_stock_nothing_is_written(
+        self, api_client, cart, products
+    ):
+        response = api_client.post(
+            f"/api/carts/{cart.id}/items/bulk/",
+            get_payload((products[0].id, 1), (products[1].id, 11)),
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert str(products[1].id) in response.data["items"][0]
+        assert not CartItem.objects.exists()
+
+    def test_if_quantity_is_invalid_returns_400(self, api_client, cart, products):
+        response = api_client.post(
+            f"/api/carts/{cart.id}/items/bulk/",
+            get_payload((products[0].id, 0)),
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestBulkReplaceCartItems:
+    def test_cart_contents_are_replaced(self, api_client, cart, products):
+        url = f"/api/carts/{cart.id}/items/"
+        api_client.post(url, {"product_id": products[0].id, "quantity": 1})
+        api_client.post(url, {"product_id": products[1].id, "quantity": 1})
+
+        response = api_client.post(
+            f"{url}bulk/replace/",
+            get_payload((products[1].id, 3), (products[2].id, 2)),
+            format="json",
+        )
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert dict(
+            CartItem.objects.filter(cart=cart).values_list("product_id", "quantity")
+        ) == {products[1].id: 3, products[2].id: 2}
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_product_ids_above_integer_range_are_written(
+        self, api_client, cart, collection
+    ):
+        # ids are bigint, the arrays must not be cast to integer
+        product = baker.make(Product, id=2**31, collection=collection, inventory=10)
+        url = f"/api/carts/{cart.id}/items/bulk/"
+        api_client.post(url, get_payload((product.id, 1)), format="json")
+
+        response = api_client.post(
+            f"{url}replace/", get_payload((product.id, 2)), format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["quantity"] == 2
+
+    def test_if_any_product_is_out_of_stock_nothing_is_written(
+        self, api_client, cart, products
+    ):
+        url = f"/api/carts/{cart.id}/items/"
+        api_client.post(url, {"product_id": products[0].id, "quantity": 1})
+
+        response = api_client.post(
+            f"{url}bulk/replace/",
+            get_payload((products[1].id, 11)),
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert CartItem.objects.get(cart=cart).product_id == products[0].id
+
+
+@pytest.mark.django_db
+class TestBulkDestroyCartItems:
+    def test_if_cart_does_not_exist_returns_404(self, api_client):
+        response = api_client.delete(f"/api/carts/{uuid4()}/items/bulk/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cart_is_cleared(self, api_client, cart, create_cart_item):
+        create_cart_item(cart, 1)
+        create_cart_item(cart, 2)
+
+        response = api_client.delete(f"/api/carts/{cart.id}/items/bulk/")
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not CartItem.objects.filter(cart=cart).exists()
+        assert cart.total_price == 0
+
+
+@pytest.mark.django_db
+class TestBulkStoredCartItems:
+    def test_items_are_added_replaced_and_cleared(
+        self, api_client, products, stored_cart_id
+    ):
+        url = f"/api/carts/{stored_cart_id}/items/bulk/"
+
+        added = api_client.post(
+            url, get_payload((products[0].id, 1), (products[1].id, 2)), format="json"
+        )
+        api_client.post(url, get_payload((products[0].id, 1)), format="json")
+        after_add = api_client.get(f"/api/carts/{stored_cart_id}/").data
+        replaced = api_client.post(
+            f"{url}replace/", get_payload((products[2].id, 3)), format="json"
+        )
+        after_replace = api_client.get(f"/api/carts/{stored_cart_id}/").data
+        cleared = api_client.delete(url)
+        after_clear = api_client.get(f"/api/carts/{stored_cart_id}/").data
+
+        assert added.status_code == status.HTTP_201_CREATED
+        assert [item["quantity"] for item in after_add["items"]] == [2, 2]
+        assert replaced.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in after_replace["items"]] == [products[2].id]
+        assert cleared.status_code == status.HTTP_204_NO_CONTENT
+        assert after_clear["items"] == []
+        assert not CartItem.objects.exists()
+
+    def test_if_any_product_is_out_of_stock_returns_400(
+        self, api_client, products, stored_cart_id
+    ):
+        response = api_client.post(
+            f"/api/carts/{stored_cart_id}/items/bulk/",
+            get_payload((products[0].id, 1), (products[1].id, 11)),
+            format="json",
+        )
+        cart = api_client.get(f"/api/carts/{stored_cart_id}/").data
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert cart["items"] == []
@@ -1,10 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 
 import pytest
+from django.db import connection
+from django.db.models import F
 from rest_framework import status
+from rest_framework.test import APIClient
 
 from orders.models import CartItem
 from orders.serializers import CartItemSerializer
+from products.models import Product
 
 
 @pytest.mark.django_db
@@ -78,6 +83,68 @@ class TestCreateCartItem:
             quantity=expected_quantity,
         ).exists()
 
+    def test_existing_item_is_repriced_at_current_unit_price(
+        self, api_client, product, cart
+    ):
+        payload = {"product_id": product.id, "quantity": 1}
+        api_client.post(f"/api/carts/{cart.id}/items/", payload)
+        Product.objects.filter(id=product.id).update(unit_price=F("unit_price") + 1)
+        product.refresh_from_db()
+
+        response = api_client.post(f"/api/carts/{cart.id}/items/", payload)
+        cart.refresh_from_db()
+
+        assert response.data["total_price"] == str(2 * product.unit_price)
+        assert cart.total_price == 2 * product.unit_price
+
+    def test_if_total_quantity_is_too_big_returns_400(self, api_client, product, cart):
+        payload = {"product_id": product.id, "quantity": product.inventory}
+        api_client.post(f"/api/carts/{cart.id}/items/", payload)
+
+        response = api_client.post(
+            f"/api/carts/{cart.id}/items/", {"product_id": product.id, "quantity": 1}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert CartItem.objects.get(cart=cart).quantity == product.inventory
+
+    def test_item_is_written_in_one_statement(
+        self, api_client, product, cart, django_assert_num_queries
+    ):
+        payload = {"product_id": product.id, "quantity": 2}
+
+        # the cart lookup and the upsert
+        with django_assert_num_queries(2):
+            response = api_client.post(f"/api/carts/{cart.id}/items/", payload)
+        cart.refresh_from_db()
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["total_price"] == str(2 * product.unit_price)
+        assert cart.total_price == 2 * product.unit_price
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentCreateCartItem:
+    def test_concurrent_adds_of_one_product_are_summed(self, product, cart):
+        def add_item(_):
+            try:
+                client = APIClient()
+                response = client.post(
+                    f"/api/carts/{cart.id}/items/",
+                    {"product_id": product.id, "quantity": 1},
+                )
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(add_item, range(4)))
+        cart.refresh_from_db()
+
+        assert statuses == [status.HTTP_201_CREATED] * 4
+        assert CartItem.objects.get(cart=cart).quantity == 4
+        assert cart.total_price == 4 * product.unit_price
+
 
 @pytest.mark.django_db
 class TestRetrieveCartItem:
@@ -0,0 +1,129 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from orders.models import Cart, CartItem
+from orders.utils import get_drifted_carts, rebuild_cart_total_prices
+
+
+def get_items_total_price(cart: Cart):
+    return sum(item.total_price for item in CartItem.objects.filter(cart=cart))
+
+
+@pytest.mark.django_db
+class TestCartTotalPrice:
+    def test_adding_items_adds_their_total_price(self, cart, create_cart_item):
+        create_cart_item(cart, 2)
+        create_cart_item(cart, 3)
+        cart.refresh_from_db()
+
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_changing_quantity_applies_the_difference(
+        self, api_client, product, cart, create_cart_item
+    ):
+        cart_item = create_cart_item(cart, 1)
+        cart_item.product = product
+        cart_item.save()
+        create_cart_item(cart, 1)
+
+        response = api_client.patch(
+            f"/api/carts/{cart.id}/items/{cart_item.id}/", {"quantity": 2}
+        )
+        cart.refresh_from_db()
+
+        assert response.status_code == 200
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_deleting_item_subtracts_its_total_price(
+        self, api_client, cart, create_cart_item
+    ):
+        cart_item = create_cart_item(cart, 1)
+        create_cart_item(cart, 1)
+
+        response = api_client.delete(f"/api/carts/{cart.id}/items/{cart_item.id}/")
+        cart.refresh_from_db()
+
+        assert response.status_code == 204
+        assert cart.total_price == get_items_total_price(cart)
+
+    def test_item_save_does_not_aggregate_the_cart(self, cart, create_cart_item):
+        cart_item = create_cart_item(cart, 1)
+        cart_item.quantity = 2
+
+        with CaptureQueriesContext(connection) as context:
+            cart_item.save()
+
+        assert not any("SUM(" in query["sql"] for query in context.captured_queries)
+
+    def test_item_save_locks_the_previous_total_price(self, cart, create_cart_item):
+        cart_item = create_cart_item(cart, 1)
+        cart_item.quantity = 2
+
+        with CaptureQueriesContext(connection) as context:
+            cart_item.save()
+
+        assert "FOR UPDATE" in context.captured_queries[0]["sql"]
+
+    def test_deleting_stale_item_subtracts_its_current_total_price(
+        self, cart, create_cart_item
+    ):
+        stale_cart_item = create_cart_item(cart, 1)
+        deleted_cart_item = CartItem.objects.get(id=stale_cart_item.id)
+        cart_item = CartItem.objects.get(id=stale_cart_item.id)
+        cart_item.quantity = 3
+        cart_item.save()
+
+        stale_cart_item.delete()
+        # deleted twice, the second delete finds no row to take off the total
+        deleted_cart_item.delete()
+        cart.refresh_from_db()
+
+        assert cart.total_price == 0
+
+
+@pytest.mark.django_db
+class TestRebuildCartTotals:
+    def test_only_drifted_carts_are_rebuilt(self, create_cart_item):
+        carts = [Cart.objects.create() for _ in range(3)]
+        for cart in carts:
+            create_cart_item(cart, 1)
+        Cart.objects.filter(id=carts[0].id).update(total_price=999)
+        Cart.objects.filter(id=carts[1].id).update(total_price=0)
+
+        assert get_drifted_carts(Cart.objects.all()).count() == 2
+        assert rebuild_cart_total_prices(Cart.objects.all()) == 2
+        for cart in carts:
+            cart.refresh_from_db()
+            assert cart.total_price == get_items_total_price(cart)
+
+    def test_empty_carts_are_rebuilt_to_zero(self, cart):
+        Cart.objects.filter(id=cart.id).update(total_price=10)
+
+        rebuild_cart_total_prices(Cart.objects.all())
+        cart.refresh_from_db()
+
+        assert cart.total_price == 0
+
+    def test_check_only_reports_drifted_carts(self, cart, create_cart_item):
+        create_cart_item(cart, 1)
+        Cart.objects.filter(id=cart.id).update(total_price=999)
+        stdout = StringIO()
+
+        call_command("rebuild_cart_totals", "--check", stdout=stdout)
+        cart.refresh_from_db()
+
+        assert "1 carts drifted." in stdout.getvalue()
+        assert cart.total_price == 999
+
+    def test_command_rebuilds_drifted_carts(self, cart, create_cart_item):
+        create_cart_item(cart, 1)
+        Cart.objects.filter(id=cart.id).update(total_price=999)
+
+        call_command("rebuild_cart_totals", stdout=StringIO())
+        cart.refresh_from_db()
+
+        assert cart.total_price == get_items_total_price(cart)
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from itertools import count
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from orders.models import Cart, CartItem, CustomerAddress, Order
+from products.models import Product
+
+URL = "/api/orders/"
+
+
+@pytest.fixture
+def create_customer_cart(django_user_model):
+    # customer addresses need unique phone numbers
+    phone_numbers = (f"+4420{i:08d}" for i in count())
+
+    def do_create_customer_cart(products: list[Product], quantity: int = 1):
+        user = baker.make(django_user_model)
+        user.customer.address = baker.make(
+            CustomerAddress, phone_number=next(phone_numbers)
+        )
+        user.customer.save()
+        cart = baker.make(Cart)
+        for product in products:
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        return user, cart
+
+    return do_create_customer_cart
+
+
+@pytest.mark.django_db
+class TestCheckoutInventory:
+    def test_inventory_is_decremented(
+        self, api_client, collection, create_customer_cart
+    ):
+        products = baker.make(Product, collection=collection, inventory=5, _quantity=2)
+        user, cart = create_customer_cart(products, 2)
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(URL, {"cart_id": cart.id})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert list(
+            Product.objects.filter(id__in=[p.id for p in products]).values_list(
+                "inventory", flat=True
+            )
+        ) == [3, 3]
+
+    def test_if_product_is_out_of_stock_returns_409(
+        self, api_client, collection, create_customer_cart
+    ):
+        products = baker.make(Product, collection=collection, inventory=5, _quantity=2)
+        user, cart = create_customer_cart(products, 2)
+        Product.objects.filter(id=products[1].id).update(inventory=1)
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(URL, {"cart_id": cart.id})
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert f"(id {products[1].id})" in response.data["detail"]
+        assert f"(id {products[0].id})" not in response.data["detail"]
+        assert not Order.objects.exists()
+        assert Cart.objects.filter(id=cart.id).exists()
+        assert Product.objects.get(id=products[0].id).inventory == 5
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentCheckout:
+    def test_concurrent_checkouts_do_not_oversell(
+        self, collection, create_customer_cart
+    ):
+        product = baker.make(Product, collection=collection, inventory=5)
+        checkouts = [create_customer_cart([product]) for _ in range(10)]
+
+        def checkout(user_and_cart):
+            user, cart = user_and_cart
+            try:
+                client = APIClient()
+                client.force_authenticate(user=user)
+                return client.post(URL, {"cart_id": cart.id}).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            statuses = list(executor.map(checkout, checkouts))
+        product.refresh_from_db()
+
+        assert statuses.count(status.HTTP_201_CREATED) == 5
+        assert statuses.count(status.HTTP_409_CONFLICT) == 5
+        assert Order.objects.count() == 5
+        assert product.inventory == 0
+
+    def test_benchmark_command_reports_no_oversell(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_checkout",
+            "--customers=20",
+            "--inventory=10",
+            "--concurrency=8",
+            stdout=stdout,
+        )
+
+        assert "Orders per second:" in stdout.getvalue()
+        assert "Oversold: 0" in stdout.getvalue()
+        assert "Stock consistent: True" in stdout.getvalue()
+        assert not Order.objects.exists()
+        assert not Product.objects.exists()
@@ -84,9 +84,17 @@ class TestCreateOrder:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
     def test_if_data_is_valid_returns_201(
-        self, api_client, test_user, create_customer_address, cart, create_cart_item
+        self,
+        api_client,
+        test_user,
+        create_customer_address,
+        product,
+        cart,
+        create_cart_item,
     ):
-        create_cart_item(cart)
+        cart_item = create_cart_item(cart)
+        cart_item.product = product
+        cart_item.save()
         create_customer_address(test_user.customer)
         api_client.force_authenticate(user=test_user)
 
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import pytest
+from django.http import Http404
+from rest_framework import status
+
+from orders.models import Cart, CartItem, Order
+
+
+@pytest.mark.django_db
+class TestStoredCarts:
+    def test_carts_are_not_written_to_database(self, api_client, cart_store):
+        response = api_client.post("/api/carts/")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["items"] == []
+        assert not Cart.objects.exists()
+        assert cart_store.redis.ttl(f"carts:{response.data['id']}") > 0
+
+    def test_missing_cart_returns_404(self, api_client, cart_store):
+        response = api_client.get(f"/api/carts/{uuid4()}/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_added_items_are_merged_and_priced(
+        self, api_client, product, stored_cart_id
+    ):
+        url = f"/api/carts/{stored_cart_id}/items/"
+        api_client.post(url, {"product_id": product.id, "quantity": 1})
+        response = api_client.post(url, {"product_id": product.id, "quantity": 2})
+        cart = api_client.get(f"/api/carts/{stored_cart_id}/").data
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["id"] == product.id
+        assert response.data["quantity"] == 3
+        assert cart["items"][0]["quantity"] == 3
+        assert cart["total_price"] == str(3 * product.unit_price)
+        assert not CartItem.objects.exists()
+
+    def test_quantity_above_stock_returns_400(
+        self, api_client, product, stored_cart_id
+    ):
+        response = api_client.post(
+            f"/api/carts/{stored_cart_id}/items/",
+            {"product_id": product.id, "quantity": product.inventory + 1},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_total_above_stock_returns_400_and_keeps_quantity(
+        self, api_client, product, stored_cart_id
+    ):
+        url = f"/api/carts/{stored_cart_id}/items/"
+        api_client.post(url, {"product_id": product.id, "quantity": 1})
+
+        response = api_client.post(
+            url, {"product_id": product.id, "quantity": product.inventory}
+        )
+        items = api_client.get(url).data["results"]
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert items[0]["quantity"] == 1
+
+    def test_concurrent_increments_are_not_lost(self, cart_store):
+        cart_id = cart_store.create()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            quantities = list(
+                executor.map(
+                    lambda _: cart_store.increment_item(cart_id, 1, 1, 5), range(8)
+                )
+            )
+
+        # three adds would go above the stock of 5, none of the others is lost
+        assert sorted(filter(None, quantities)) == [1, 2, 3, 4, 5]
+        assert cart_store.get_items(cart_id) == {1: 5}
+
+    def test_increment_of_missing_cart_raises_404(self, cart_store):
+        with pytest.raises(Http404):
+            cart_store.increment_item(uuid4(), 1, 1, 5)
+
+    def test_cursor_pagination_of_items_returns_404(
+        self, api_client, product, stored_cart_id
+    ):
+        url = f"/api/carts/{stored_cart_id}/items/"
+        api_client.post(url, {"product_id": product.id, "quantity": 1})
+
+        response = api_client.get(url + "?pagination=cursor")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_items_are_updated_and_removed(self, api_client, product, stored_cart_id):
+        url = f"/api/carts/{stored_cart_id}/items/"
+        api_client.post(url, {"product_id": product.id, "quantity": 1})
+
+        updated = api_client.patch(f"{url}{product.id}/", {"quantity": 2})
+        deleted = api_client.delete(f"{url}{product.id}/")
+        items = api_client.get(url).data["results"]
+
+        assert updated.data["quantity"] == 2
+        assert deleted.status_code == status.HTTP_204_NO_CONTENT
+        assert items == []
+
+    def test_checkout_creates_order_and_removes_cart(
+        self,
+        api_client,
+        test_user,
+        create_customer_address,
+        product,
+        stored_cart_id,
+        django_capture_on_commit_callbacks,
+    ):
+        api_client.post(
+            f"/api/carts/{stored_cart_id}/items/",
+            {"product_id": product.id, "quantity": 1},
+        )
+        create_customer_address(test_user.customer)
+        api_client.force_authenticate(user=test_user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post("/api/orders/", {"cart_id": stored_cart_id})
+        order = Order.objects.get()
+        cart_response = api_client.get(f"/api/carts/{stored_cart_id}/")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert order.total_price == product.unit_price
+        assert order.orderitem_set.get().product_id == product.id
+        assert cart_response.status_code == status.HTTP_404_NOT_FOUND
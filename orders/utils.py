@@ -0,0 +1,260 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import (
+    DecimalField,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from orders.models import Cart, CartItem, Customer
+from products.models import Product
+
+CUSTOMER_ID_CACHE_KEY = "customers:user:{}"
+CUSTOMER_ID_CACHE_TIMEOUT = 60 * 60
+
+# requested product id -> quantity pairs joined with their products, shared
+# by the statements below
+CART_ITEMS_PRODUCT_SQL = """
+product AS (
+    SELECT products_product.id, title, slug, unit_price, inventory,
+        requested.quantity AS requested_quantity
+    FROM products_product
+    JOIN unnest(%(product_ids)s::bigint[], %(quantities)s::integer[])
+        AS requested (product_id, quantity)
+        ON requested.product_id = products_product.id
+)
+"""
+
+CART_ITEMS_RESULT_SQL = """
+SELECT item.id, item.quantity, item.total_price,
+    product.id, product.title, product.slug, product.unit_price, product.inventory
+FROM item
+JOIN product ON product.id = item.product_id
+ORDER BY item.id
+"""
+
+# items are priced at the current unit price, like every other cart item
+# write, and the cart total moves by the difference to their previous totals.
+# The previous totals are locked and read before anything is written, the
+# ORDER BY of the insert sorts, and so reads, every source row first. An item
+# inserted concurrently after the statement started has no previous total and
+# was priced at the current unit price too.
+ADD_CART_ITEMS_SQL = f"""
+WITH {CART_ITEMS_PRODUCT_SQL}, previous AS (
+    SELECT product_id, total_price
+    FROM orders_cartitem
+    WHERE cart_id = %(cart_id)s AND product_id IN (SELECT id FROM product)
+    FOR UPDATE
+), item AS (
+    INSERT INTO orders_cartitem (cart_id, product_id, quantity, total_price)
+    SELECT %(cart_id)s, id, requested_quantity, requested_quantity * unit_price
+    FROM product
+    LEFT JOIN previous ON previous.product_id = product.id
+    WHERE inventory >= requested_quantity
+    ORDER BY id
+    ON CONFLICT (cart_id, product_id) DO UPDATE SET
+        quantity = orders_cartitem.quantity + EXCLUDED.quantity,
+        total_price = (orders_cartitem.quantity + EXCLUDED.quantity)
+            * (SELECT unit_price FROM product WHERE id = EXCLUDED.product_id)
+    WHERE orders_cartitem.quantity + EXCLUDED.quantity
+        <= (SELECT inventory FROM product WHERE id = EXCLUDED.product_id)
+    RETURNING id, product_id, quantity, total_price
+), cart AS (
+    UPDATE orders_cart
+    SET total_price = orders_cart.total_price + changed.total_price
+    FROM (
+        SELECT SUM(
+            item.total_price - COALESCE(
+                previous.total_price,
+                (item.quantity - product.requested_quantity) * product.unit_price
+            )
+        ) AS total_price
+        FROM item
+        JOIN product ON product.id = item.product_id
+        LEFT JOIN previous ON previous.product_id = item.product_id
+    ) AS changed
+    WHERE orders_cart.id = %(cart_id)s AND changed.total_price IS NOT NULL
+)
+{CART_ITEMS_RESULT_SQL}
+"""
+
+# items of other products are deleted and the cart total is set to the sum of
+# the written items, an empty request clears the cart
+REPLACE_CART_ITEMS_SQL = f"""
+WITH {CART_ITEMS_PRODUCT_SQL}, removed AS (
+    DELETE FROM orders_cartitem
+    WHERE cart_id = %(cart_id)s AND product_id <> ALL(%(product_ids)s::bigint[])
+), item AS (
+    INSERT INTO orders_cartitem (cart_id, product_id, quantity, total_price)
+    SELECT %(cart_id)s, id, requested_quantity, requested_quantity * unit_price
+    FROM product
+    WHERE inventory >= requested_quantity
+    ORDER BY id
+    ON CONFLICT (cart_id, product_id) DO UPDATE SET
+        quantity = EXCLUDED.quantity,
+        total_price = EXCLUDED.total_price
+    RETURNING id, product_id, quantity, total_price
+), cart AS (
+    UPDATE orders_cart
+    SET total_price = (SELECT COALESCE(SUM(total_price), 0) FROM item)
+    WHERE id = %(cart_id)s
+)
+{CART_ITEMS_RESULT_SQL}
+"""
+
+# rows are locked in id order, so concurrent checkouts of overlapping carts
+# queue up instead of deadlocking, and the stock condition is checked against
+# the latest committed inventory
+DECREMENT_INVENTORY_SQL = """
+WITH requested AS (
+    SELECT product_id, quantity
+    FROM unnest(%(product_ids)s::bigint[], %(quantities)s::integer[])
+        AS requested (product_id, quantity)
+), locked AS (
+    SELECT id
+    FROM products_product
+    WHERE id IN (SELECT product_id FROM requested)
+    ORDER BY id
+    FOR NO KEY UPDATE
+)
+UPDATE products_product
+SET inventory = inventory - requested.quantity
+FROM requested
+JOIN locked ON locked.id = requested.product_id
+WHERE products_product.id = requested.product_id
+    AND products_product.inventory >= requested.quantity
+RETURNING products_product.id
+"""
+
+
+def get_customer_id(user_id) -> int:
+    """
+    Returns the id of the user's customer. A user keeps the same customer,
+    so the id is cached until the customer is deleted.
+    """
+    cache_key = CUSTOMER_ID_CACHE_KEY.format(user_id)
+    customer_id = cache.get(cache_key)
+    if customer_id is None:
+        customer_id = Customer.objects.values_list("id", flat=True).get(user_id=user_id)
+        cache.set(cache_key, customer_id, timeout=CUSTOMER_ID_CACHE_TIMEOUT)
+    return customer_id
+
+
+def update_cart_total_price(cart_id, delta: Decimal):
+    # F() keeps concurrent item writes from overwriting each other's totals
+    if delta:
+        Cart.objects.filter(id=cart_id).update(total_price=F("total_price") + delta)
+
+
+def sum_cart_items_total_price() -> Coalesce:
+    cart_items = (
+        CartItem.objects.filter(cart_id=OuterRef("pk"))
+        .order_by()
+        .values("cart_id")
+        .annotate(items_total_price=Sum("total_price"))
+        .values("items_total_price")
+    )
+    return Coalesce(
+        Subquery(cart_items), Value(Decimal(0)), output_field=DecimalField()
+    )
+
+
+def get_drifted_carts(queryset: QuerySet) -> QuerySet:
+    """
+    Returns the carts whose total_price differs from the sum of their items.
+    """
+    return queryset.alias(items_total_price=sum_cart_items_total_price()).exclude(
+        total_price=F("items_total_price")
+    )
+
+
+def rebuild_cart_total_prices(queryset: QuerySet) -> int:
+    # only drifted carts are written, so a consistent table stays untouched
+    drifted_ids = get_drifted_carts(queryset).values("id")
+    return Cart.objects.filter(id__in=drifted_ids).update(
+        total_price=sum_cart_items_total_price()
+    )
+
+
+def write_cart_items(sql: str, cart_id, quantities: dict[int, int]) -> list[CartItem]:
+    product_ids = list(quantities)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {
+                "cart_id": str(cart_id),
+                "product_ids": product_ids,
+                "quantities": [quantities[product_id] for product_id in product_ids],
+            },
+        )
+        rows = cursor.fetchall()
+
+    return [
+        CartItem(
+            id=item_id,
+            cart_id=cart_id,
+            product=Product(
+                id=product_id,
+                title=title,
+                slug=slug,
+                unit_price=unit_price,
+                inventory=inventory,
+            ),
+            quantity=quantity,
+            total_price=total_price,
+        )
+        for (
+            item_id,
+            quantity,
+            total_price,
+            product_id,
+            title,
+            slug,
+            unit_price,
+            inventory,
+        ) in rows
+    ]
+
+
+def add_cart_items(cart_id, quantities: dict[int, int]) -> list[CartItem]:
+    """
+    Adds the quantities of the products to the cart in one statement,
+    creating items or incrementing existing ones, and updates the cart total.
+    Products that do not exist or whose item would exceed their stock are
+    skipped and missing from the returned items.
+    """
+    return write_cart_items(ADD_CART_ITEMS_SQL, cart_id, quantities)
+
+
+def replace_cart_items(cart_id, quantities: dict[int, int]) -> list[CartItem]:
+    """
+    Makes the quantities the whole content of the cart in one statement.
+    Products that do not exist or lack the stock are skipped and missing from
+    the returned items.
+    """
+    return write_cart_items(REPLACE_CART_ITEMS_SQL, cart_id, quantities)
+
+
+def decrement_inventories(quantities: dict[int, int]) -> set[int]:
+    """
+    Takes the quantities out of the products' inventory in one statement.
+    Products without enough stock are left unchanged, the ids of the
+    decremented products are returned.
+    """
+    product_ids = list(quantities)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DECREMENT_INVENTORY_SQL,
+            {
+                "product_ids": product_ids,
+                "quantities": [quantities[product_id] for product_id in product_ids],
+            },
+        )
+        return {product_id for (product_id,) in cursor.fetchall()}
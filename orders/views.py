@@ -1,4 +1,11 @@
+from operator import attrgetter
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import Http404
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.generics import get_object_or_404, RetrieveUpdateDestroyAPIView
 from rest_framework.mixins import (
     CreateModelMixin,
@@ -9,17 +16,21 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from orders.carts import get_cart_store, get_cart_total_price, get_stored_cart_items
 from orders.models import CustomerAddress, Cart, CartItem, Order, Customer
 from orders.serializers import (
+    BulkCartItemSerializer,
     CustomerAddressSerializer,
     CartSerializer,
     CartItemSerializer,
     OrderSerializer,
+    StoredCartSerializer,
     UpdateCartItemSerializer,
     CreateCartItemSerializer,
     CreateOrderSerializer,
     UpdateOrderSerializer,
 )
+from orders.utils import get_customer_id
 
 
 # Create your views here.
@@ -39,12 +50,10 @@ class CustomerAddressView(CreateModelMixin, RetrieveUpdateDestroyAPIView):
         return self.create(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
-        user_id = self.request.user.id
-        customer = Customer.objects.get(user_id=user_id)
+        customer_id = get_customer_id(self.request.user.id)
         address: CustomerAddress = self.get_object()
 
-        customer.address = None
-        customer.save()
+        Customer.objects.filter(id=customer_id).update(address=None)
 
         if address.customer_set.count() == 0:
             address.delete()
@@ -58,6 +67,43 @@ class CartViewSet(
     queryset = Cart.objects.prefetch_related("cartitem_set__product").all()
     serializer_class = CartSerializer
 
+    @staticmethod
+    def get_stored_cart_data(cart_id, items: dict[int, int]) -> dict:
+        cart_items = get_stored_cart_items(items)
+        cart = {
+            "id": cart_id,
+            "items": cart_items,
+            "total_price": get_cart_total_price(cart_items),
+        }
+        return StoredCartSerializer(cart).data
+
+    def create(self, request, *args, **kwargs):
+        cart_store = get_cart_store()
+        if cart_store is None:
+            return super().create(request, *args, **kwargs)
+
+        data = self.get_stored_cart_data(cart_store.create(), {})
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        cart_store = get_cart_store()
+        if cart_store is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        cart_id = self.kwargs["pk"]
+        return Response(
+            self.get_stored_cart_data(cart_id, cart_store.get_items(cart_id))
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        cart_store = get_cart_store()
+        if cart_store is None:
+            return super().destroy(request, *args, **kwargs)
+
+        if not cart_store.delete(self.kwargs["pk"]):
+            raise Http404("No Cart matches the given query.")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class CartItemViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options", "trace"]
@@ -65,6 +111,10 @@ class CartItemViewSet(ModelViewSet):
 
     def get_queryset(self):
         cart_id = self.kwargs["cart_pk"]
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            return get_stored_cart_items(cart_store.get_items(cart_id))
+
         cart = get_object_or_404(Cart, id=cart_id)
 
         return (
@@ -78,18 +128,84 @@ class CartItemViewSet(ModelViewSet):
             return CreateCartItemSerializer
         elif self.action == "partial_update":
             return UpdateCartItemSerializer
+        elif self.action in ["bulk_create", "bulk_replace"]:
+            return BulkCartItemSerializer
         else:
             return CartItemSerializer
 
-    def create(self, request, *args, **kwargs):
+    def filter_queryset(self, queryset):
+        if isinstance(queryset, QuerySet):
+            return super().filter_queryset(queryset)
+
+        # items of stored carts are a short list, ordered in python
+        ordering = OrderingFilter().get_ordering(self.request, queryset, self) or []
+        for field in reversed(ordering):
+            queryset = sorted(
+                queryset,
+                key=attrgetter(field.lstrip("-")),
+                reverse=field.startswith("-"),
+            )
+        return queryset
+
+    def get_object(self):
+        if get_cart_store() is None:
+            return super().get_object()
+
+        for cart_item in self.get_queryset():
+            if str(cart_item.id) == self.kwargs["pk"]:
+                return cart_item
+        raise Http404("No CartItem matches the given query.")
+
+    def perform_destroy(self, instance):
+        cart_store = get_cart_store()
+        if cart_store is None:
+            # the item row stays locked until the cart total is updated
+            with transaction.atomic():
+                return super().perform_destroy(instance)
+        cart_store.remove_item(self.kwargs["cart_pk"], instance.id)
+
+    def check_cart_exists(self):
+        # missing carts are a 404 before the payload is validated
         cart_id = self.kwargs["cart_pk"]
-        get_object_or_404(Cart, id=cart_id)
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            cart_store.get_items(cart_id)
+        else:
+            get_object_or_404(Cart, id=cart_id)
+
+    def create(self, request, *args, **kwargs):
+        self.check_cart_exists()
         return super().create(request, *args, **kwargs)
 
+    def get_bulk_serializer(self) -> BulkCartItemSerializer:
+        self.check_cart_exists()
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        cart_items = self.get_bulk_serializer().add(self.kwargs["cart_pk"])
+        data = CartItemSerializer(cart_items, many=True).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="bulk/replace")
+    def bulk_replace(self, request, *args, **kwargs):
+        cart_items = self.get_bulk_serializer().replace(self.kwargs["cart_pk"])
+        return Response(CartItemSerializer(cart_items, many=True).data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        self.check_cart_exists()
+        BulkCartItemSerializer.clear(self.kwargs["cart_pk"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class OrderViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options", "trace"]
     ordering_fields = ["status", "created_at", "updated_at", "total_price"]
+    # writes to these models invalidate cached list counts
+    count_cache_dependencies = [Order]
 
     def get_queryset(self):
         queryset = (
@@ -102,8 +218,7 @@ class OrderViewSet(ModelViewSet):
         if user.is_staff:
             return queryset
 
-        customer_id = Customer.objects.only("id").get(user_id=user.id)
-        return queryset.filter(customer_id=customer_id)
+        return queryset.filter(customer_id=get_customer_id(user.id))
 
     def get_serializer_class(self):
         if self.action == "create":
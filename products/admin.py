@@ -1,12 +1,11 @@
 from django.contrib import admin, messages
-from django.db.models import QuerySet, Count, Q
+from django.db.models import QuerySet, Count
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.http import urlencode
 from django_admin_inline_paginator.admin import TabularInlinePaginated
 
 from products.models import Product, ProductImage, Collection, Review, Promotion
-from votes.models import Vote
 
 
 # Register your models here.
@@ -40,9 +39,6 @@ class CollectionAdmin(admin.ModelAdmin):
         )
         return format_html("<a href='{}'>{}</a>", url, collection.products_count)  # noqa
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(products_count=Count("product"))
-
 
 class ProductImageInline(TabularInlinePaginated):
     model = ProductImage
@@ -125,10 +121,6 @@ class ProductAdmin(admin.ModelAdmin):
             super()
             .get_queryset(request)
             .prefetch_related("promotions", "productimage_set")
-            .annotate(
-                likes_count=Count("votes", filter=Q(votes__value=Vote.LIKE)),
-                dislikes_count=Count("votes", filter=Q(votes__value=Vote.DISLIKE)),
-            )
         )
 
     @admin.display(ordering="inventory")
@@ -141,14 +133,6 @@ class ProductAdmin(admin.ModelAdmin):
     def collection_title(product):
         return product.collection.title
 
-    @staticmethod
-    def likes_count(product):
-        return product.likes_count
-
-    @staticmethod
-    def dislikes_count(product):
-        return product.dislikes_count
-
     @admin.action(description="Clear inventory")
     def clear_inventory(self, request, queryset: QuerySet):
         updated_count = queryset.update(inventory=0)
@@ -167,21 +151,3 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display = ["author", "product", "rating", "created_at"]
     list_filter = ["created_at"]
     list_select_related = ["product", "author"]
-
-    def get_queryset(self, request):
-        return (
-            super()
-            .get_queryset(request)
-            .annotate(
-                likes_count=Count("votes", filter=Q(votes__value=Vote.LIKE)),
-                dislikes_count=Count("votes", filter=Q(votes__value=Vote.DISLIKE)),
-            )
-        )
-
-    @staticmethod
-    def likes_count(review):
-        return review.likes_count
-
-    @staticmethod
-    def dislikes_count(review):
-        return review.dislikes_count
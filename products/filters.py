@@ -1,17 +1,31 @@
 from django_filters import rest_framework as filters
 
 from products.models import Product, Review
+from products.search import search_products
 
 
 class ProductFilter(filters.FilterSet):
     class Meta:
         model = Product
-        fields = ["title", "unit_price", "inventory", "last_update", "collection"]
+        fields = [
+            "title",
+            "unit_price",
+            "final_price",
+            "inventory",
+            "last_update",
+            "collection",
+        ]
 
     title = filters.CharFilter(lookup_expr="icontains")
     unit_price = filters.RangeFilter()
+    final_price = filters.RangeFilter()
     inventory = filters.RangeFilter()
     last_update = filters.DateRangeFilter()
+    search = filters.CharFilter(method="filter_search", label="Search")
+
+    @staticmethod
+    def filter_search(queryset, name, value):
+        return search_products(queryset, value)
 
 
 class ReviewFilter(filters.FilterSet):
@@ -0,0 +1,95 @@
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from products.filters import ProductFilter
+from products.models import Product, Collection
+from products.search import product_search_vector
+
+WORDS = [
+    "apple", "bread", "butter", "cheese", "chicken", "chocolate", "coffee",
+    "cookie", "cream", "garlic", "honey", "lemon", "mango", "noodle", "olive",
+    "orange", "pasta", "pepper", "potato", "rice", "salmon", "sauce", "spinach",
+    "strawberry", "sugar", "tomato", "vanilla", "vinegar", "walnut", "yogurt",
+]  # fmt: skip
+
+TERMS = ["chocolate", "olive oil", "strawbery", "garlc sauce", "honey walnut"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the title icontains filter with the full-text search filter "
+        "on a generated catalog. Generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.populate(options["rows"])
+                for term in TERMS:
+                    self.stdout.write(f"\nTerm: {term!r}")
+                    self.benchmark("icontains", {"title": term}, options["repeat"])
+                    self.benchmark("search", {"search": term}, options["repeat"])
+                raise Rollback
+        except Rollback:
+            self.stdout.write("\nGenerated rows rolled back.")
+
+    def populate(self, rows: int):
+        self.stdout.write(f"Generating {rows} products...")
+        collection = Collection.objects.create(title="Benchmark collection")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO products_product
+                    (title, slug, description, unit_price, inventory, last_update,
+                     collection_id)
+                SELECT w[1 + i %% s] || ' ' || w[1 + (i / s) %% s] || ' '
+                           || w[1 + (i / (s * s)) %% s] || ' ' || i,
+                       'benchmark-' || i,
+                       w[1 + (i * 7) %% s] || ' ' || w[1 + (i * 11) %% s] || ' '
+                           || w[1 + (i * 13) %% s],
+                       (random() * 100)::numeric(10, 2),
+                       (random() * 100)::int,
+                       now(),
+                       %(collection_id)s
+                FROM generate_series(1, %(rows)s) AS i,
+                     (SELECT %(words)s::text[] AS w, %(size)s AS s) AS vocabulary
+                """,
+                {
+                    "collection_id": collection.id,
+                    "rows": rows,
+                    "words": WORDS,
+                    "size": len(WORDS),
+                },
+            )
+            Product.objects.filter(collection=collection).update(
+                search_vector=product_search_vector()
+            )
+            cursor.execute("ANALYZE products_product")
+
+    def benchmark(self, label: str, data: dict, repeat: int):
+        queryset = Product.objects.select_related("collection").order_by("title")
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            filtered = ProductFilter(data, queryset=queryset).qs
+            filtered.count()
+            list(filtered[:20])
+            timings.append((perf_counter() - start) * 1000)
+
+        p95 = quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f"  {label:<10} mean {mean(timings):8.2f} ms   p95 {p95:8.2f} ms"
+            f"   matches {filtered.count()}"
+        )
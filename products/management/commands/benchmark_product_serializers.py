@@ -0,0 +1,96 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Product, Collection, Promotion, ProductImage
+from products.serializers import ProductSerializer, ProductValuesSerializer
+from products.views import ProductViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares rows per second of ProductSerializer and ProductValuesSerializer "
+        "on generated products. Generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options["rows"])
+            queryset = ProductViewSet.queryset.filter(
+                collection__title="Benchmark collection"
+            )
+
+            serializer_rate, serializer_output = self.benchmark(
+                lambda page: ProductSerializer(page, many=True).data,
+                queryset,
+                options,
+            )
+            values_serializer = ProductValuesSerializer()
+            values_rate, values_output = self.benchmark(
+                values_serializer.to_representation,
+                values_serializer.get_queryset(queryset),
+                options,
+            )
+
+            self.stdout.write(f"ProductSerializer       {serializer_rate:10.0f} rows/s")
+            self.stdout.write(f"ProductValuesSerializer {values_rate:10.0f} rows/s")
+            self.stdout.write(
+                f"Speedup                 {values_rate / serializer_rate:10.2f}x"
+            )
+            self.stdout.write(
+                "Identical output: " + str(serializer_output == values_output)
+            )
+
+            transaction.set_rollback(True)
+
+    def populate(self, rows: int):
+        self.stdout.write(f"Generating {rows} products...")
+        collection = Collection.objects.create(title="Benchmark collection")
+        promotions = Promotion.objects.bulk_create(
+            Promotion(name=f"Promotion {i}", discount=i * 10) for i in range(1, 4)
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                title=f"Benchmark product {i}",
+                slug=f"benchmark-product-{i}",
+                description="Generated for the serializer benchmark.",
+                unit_price=i % 100 + 0.99,
+                inventory=i % 50,
+                collection=collection,
+            )
+            for i in range(rows)
+        )
+        Product.promotions.through.objects.bulk_create(
+            Product.promotions.through(
+                product_id=product.id, promotion_id=promotions[i % 3].id
+            )
+            for i, product in enumerate(products)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"products/images/{product.id}.webp")
+            for product in products
+        )
+
+    def benchmark(self, serialize, queryset, options) -> tuple[float, bytes]:
+        # pages are selected by id so deep OFFSETs do not dominate the timings
+        page_size = options["page_size"]
+        ids = list(queryset.values_list("id", flat=True))
+        pages = [ids[i : i + page_size] for i in range(0, len(ids), page_size)]
+
+        best = None
+        for _ in range(options["repeat"]):
+            output = []
+            start = perf_counter()
+            for page in pages:
+                output += serialize(queryset.filter(id__in=page))
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return options["rows"] / best, JSONRenderer().render(output)
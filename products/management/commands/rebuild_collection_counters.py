@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Collection
+from products.utils import rebuild_collection_products_count
+
+
+class Command(BaseCommand):
+    help = "Recalculates products counters of collections."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding collection counters...")
+        with transaction.atomic():
+            updated_count = rebuild_collection_products_count(Collection.objects.all())
+        self.stdout.write(f"{updated_count} rows updated.")
+
+        self.stdout.write("Done!")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product
+from products.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recalculates review counts, rating sums and histograms of products."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding product rating aggregates...")
+        with transaction.atomic():
+            updated_count = rebuild_rating_aggregates(Product.objects.all())
+        self.stdout.write(f"{updated_count} rows updated.")
+
+        self.stdout.write("Done!")
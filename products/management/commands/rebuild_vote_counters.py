@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product, Review
+from votes.utils import rebuild_vote_counters
+
+
+class Command(BaseCommand):
+    help = "Recalculates likes and dislikes counters of products and reviews."
+
+    def handle(self, *args, **options):
+        for model in [Product, Review]:
+            self.stdout.write(f"Rebuilding {model._meta.verbose_name} counters...")
+            with transaction.atomic():
+                updated_count = rebuild_vote_counters(model.objects.all())
+            self.stdout.write(f"{updated_count} rows updated.")
+
+        self.stdout.write("Done!")
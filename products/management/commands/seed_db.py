@@ -3,6 +3,11 @@ from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.db import connection
 
+from products.models import Collection, Product
+from products.pricing import update_final_prices
+from products.search import product_search_vector
+from products.utils import rebuild_collection_products_count
+
 
 class Command(BaseCommand):
     help = (
@@ -16,6 +21,9 @@ class Command(BaseCommand):
         with connection.cursor() as cursor:
             try:
                 cursor.execute(sql)
+                Product.objects.update(search_vector=product_search_vector())
+                rebuild_collection_products_count(Collection.objects.all())
+                update_final_prices(Product.objects.all())
                 self.stdout.write("Done!")
             except Exception as e:
                 self.stdout.write(f"Error seeding database! {e}")
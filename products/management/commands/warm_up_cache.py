@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.caching import RESPONSE_CACHE_TIMEOUT
+from products.warmup import (
+    WARMUP_DONE_CACHE_KEY,
+    acquire_warmup_lock,
+    get_warmup_config,
+    get_warmup_paths,
+    release_warmup_lock,
+    warm_up,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests the catalog pages and the most viewed products, so the caches "
+        "are warm before traffic arrives. Run it after deploys."
+    )
+
+    def add_arguments(self, parser):
+        config = get_warmup_config()
+        parser.add_argument("--base-url", default=config["BASE_URL"])
+        parser.add_argument("--pages", type=int, default=config["PAGES"])
+        parser.add_argument("--top-products", type=int, default=config["TOP_PRODUCTS"])
+        parser.add_argument("--concurrency", type=int, default=config["CONCURRENCY"])
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=config["RATE"],
+            help="Maximum number of requests started per second.",
+        )
+
+    def handle(self, *args, **options):
+        token = acquire_warmup_lock()
+        if token is None:
+            self.stdout.write("A warm-up is already running.")
+            return
+
+        try:
+            paths = get_warmup_paths(options["pages"], options["top_products"])
+            self.stdout.write(f"Warming up {len(paths)} urls...")
+            statuses = warm_up(
+                paths, options["base_url"], options["concurrency"], options["rate"]
+            )
+            cache.set(WARMUP_DONE_CACHE_KEY, True, timeout=RESPONSE_CACHE_TIMEOUT)
+        finally:
+            release_warmup_lock(token)
+
+        for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f"{status or 'failed'}: {count}")
+        self.stdout.write("Done!")
@@ -0,0 +1,82 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+VOTE_LIKE = 1
+VOTE_DISLIKE = -1
+
+
+def populate_vote_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("votes", "Vote")
+
+    for model_name in ["product", "review"]:
+        model = apps.get_model("products", model_name)
+        content_type = ContentType.objects.filter(
+            app_label="products", model=model_name
+        ).first()
+        if content_type is None:
+            continue
+
+        def count_votes(value):
+            votes = (
+                Vote.objects.filter(
+                    content_type=content_type, object_id=OuterRef("pk"), value=value
+                )
+                .order_by()
+                .values("object_id")
+                .annotate(count=Count("id"))
+                .values("count")
+            )
+            return Coalesce(Subquery(votes), Value(0))
+
+        model.objects.update(
+            likes_count=count_votes(VOTE_LIKE),
+            dislikes_count=count_votes(VOTE_DISLIKE),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("products", "0001_initial"),
+        ("votes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="likes_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="dislikes_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="likes_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="dislikes_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["likes_count"], name="products_pr_likes_c_87aaab_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["dislikes_count"], name="products_pr_dislike_b69f4d_idx"
+            ),
+        ),
+        migrations.RunPython(populate_vote_counters, migrations.RunPython.noop),
+    ]
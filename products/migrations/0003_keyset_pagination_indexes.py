@@ -0,0 +1,84 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0002_vote_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_unit_pr_4a871b_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_likes_c_87aaab_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_dislike_b69f4d_idx",
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["unit_price", "id"], name="products_pr_unit_pr_09a3e0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["inventory", "id"], name="products_pr_invento_9918d3_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["last_update", "id"], name="products_pr_last_up_376318_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["likes_count", "id"], name="products_pr_likes_c_73c18f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["dislikes_count", "id"], name="products_pr_dislike_1578c9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "rating", "id"],
+                name="products_re_product_6a3cd3_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "created_at", "id"],
+                name="products_re_product_42d658_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "likes_count", "id"],
+                name="products_re_product_d882a2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "dislikes_count", "id"],
+                name="products_re_product_a6b136_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-18 13:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Collection = apps.get_model("products", "Collection")
+
+    collection_title = Subquery(
+        Collection.objects.filter(id=OuterRef("collection_id")).values("title")[:1]
+    )
+    Product.objects.update(
+        search_vector=SearchVector("title", weight="A", config="english")
+        + SearchVector(collection_title, weight="B", config="english")
+        + SearchVector("description", weight="C", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="products_product_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="products_product_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-18 13:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_products_count(apps, schema_editor):
+    Collection = apps.get_model("products", "Collection")
+    Product = apps.get_model("products", "Product")
+
+    products = (
+        Product.objects.filter(collection_id=OuterRef("pk"))
+        .order_by()
+        .values("collection_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Collection.objects.update(products_count=Coalesce(Subquery(products), Value(0)))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0004_product_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="products_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_products_count, migrations.RunPython.noop),
+    ]
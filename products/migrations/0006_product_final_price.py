@@ -0,0 +1,53 @@
+# Generated by Django 5.1 on 2026-10-18 13:31
+
+from django.db import migrations, models
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Round
+
+
+def populate_final_price(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+
+    discounts = (
+        Product.promotions.through.objects.filter(product_id=OuterRef("pk"))
+        .order_by()
+        .values("product_id")
+        .annotate(discount=Max("promotion__discount"))
+        .values("discount")
+    )
+    price = ExpressionWrapper(
+        F("unit_price") * (Value(100) - Coalesce(Subquery(discounts), Value(0))) / 100,
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    Product.objects.update(final_price=Round(price, 2))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0005_collection_products_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="final_price",
+            field=models.DecimalField(
+                decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.RunPython(populate_final_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["final_price", "id"], name="products_pr_final_p_cc2cba_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.1 on 2026-10-18 13:33
+
+import django.contrib.postgres.fields
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+import products.models
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+RATING_HISTOGRAM_SQL = """
+    ARRAY(
+        SELECT COUNT(review.id)::integer
+        FROM generate_series(1, 10) AS bucket
+        LEFT JOIN products_review AS review
+            ON review.rating = bucket AND review.product_id = products_product.id
+        GROUP BY bucket
+        ORDER BY bucket
+    )
+"""
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Review = apps.get_model("products", "Review")
+
+    reviews = (
+        Review.objects.filter(product_id=OuterRef("pk")).order_by().values("product_id")
+    )
+    Product.objects.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count("id")).values("count")), Value(0)
+        ),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")), Value(0)
+        ),
+        rating_histogram=RawSQL(RATING_HISTOGRAM_SQL, []),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0006_product_final_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="reviews_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_sum",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_histogram",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.PositiveIntegerField(),
+                db_default=models.Value(
+                    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                    output_field=django.contrib.postgres.fields.ArrayField(
+                        base_field=models.PositiveIntegerField(), size=None
+                    ),
+                ),
+                default=products.models.empty_rating_histogram,
+                editable=False,
+                size=10,
+            ),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="product",
+            name="average_rating",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        reviews_count__gt=0,
+                        then=django.db.models.functions.math.Round(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.functions.comparison.Cast(
+                                    "rating_sum",
+                                    models.DecimalField(
+                                        decimal_places=2, max_digits=12
+                                    ),
+                                ),
+                                "/",
+                                models.F("reviews_count"),
+                            ),
+                            2,
+                        ),
+                    ),
+                    default=models.Value(0),
+                    output_field=models.DecimalField(decimal_places=2, max_digits=4),
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=4),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["average_rating", "id"], name="products_pr_average_a6a1d6_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["reviews_count", "id"], name="products_pr_reviews_99325b_idx"
+            ),
+        ),
+    ]
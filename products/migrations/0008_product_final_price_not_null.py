@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-18 14:21
+
+from django.db import migrations, models
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Round
+
+
+def populate_missing_final_price(apps, schema_editor):
+    # rows inserted without signals, like bulk_create, could be left without one
+    Product = apps.get_model("products", "Product")
+
+    discounts = (
+        Product.promotions.through.objects.filter(product_id=OuterRef("pk"))
+        .order_by()
+        .values("product_id")
+        .annotate(discount=Max("promotion__discount"))
+        .values("discount")
+    )
+    price = ExpressionWrapper(
+        F("unit_price") * (Value(100) - Coalesce(Subquery(discounts), Value(0))) / 100,
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    Product.objects.filter(final_price=None).update(final_price=Round(price, 2))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0007_product_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_missing_final_price, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="product",
+            name="final_price",
+            field=models.DecimalField(
+                db_default=0, decimal_places=2, default=0, editable=False, max_digits=10
+            ),
+        ),
+    ]
@@ -1,31 +1,127 @@
-from django.http import Http404
-from rest_framework.exceptions import NotFound
-from rest_framework.generics import get_object_or_404
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ValidationError as DjangoValidationError,
+)
+from django.db.models import Case, Q, Value, When
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS
 
 
 class MultipleFieldLookupMixin:
     def get_object(self):
-        # Get the base queryset
-        queryset = self.get_queryset()
+        return self.lookup_object(self.get_queryset())
 
-        # Get the lookup fields. If not defined, default to ['id']
+    def get_lookup_values(self, queryset) -> dict:
+        # only fields the identifier can be a valid value for take part in the
+        # lookup, e.g. a non-numeric slug is never compared against the id
         lookup_fields = getattr(self, "lookup_fields", ["id"])
+        identifier = self.kwargs[self.lookup_field]
 
+        lookup_values = {}
         for field in lookup_fields:
             try:
-                # Try to filter the queryset based on the lookup field
-                filter_kwargs = {field: self.kwargs[self.lookup_field]}
-                obj = get_object_or_404(queryset, **filter_kwargs)
+                model_field = queryset.model._meta.get_field(field)
+                lookup_values[field] = model_field.to_python(identifier)
+            except (FieldDoesNotExist, DjangoValidationError):
+                continue
+        return lookup_values
 
-                # Check if the request has the necessary permissions
-                self.check_object_permissions(self.request, obj)
-                return obj
+    def lookup_object(self, queryset):
+        lookup_values = self.get_lookup_values(queryset)
 
-            except Http404:
-                # If the object is not found, continue to the next lookup field
-                continue
+        if not lookup_values:
+            self.raise_not_found(queryset)
+
+        lookups = [Q(**{field: value}) for field, value in lookup_values.items()]
+        # a single query for all lookup fields; when several rows match (a
+        # numeric slug equal to another product's id) the earlier field wins
+        precedence = Case(
+            *[When(lookup, then=Value(index)) for index, lookup in enumerate(lookups)]
+        )
+        objs = list(
+            queryset.filter(reduce(or_, lookups)).order_by(precedence, "pk")[:1]
+        )
+        if not objs:
+            self.raise_not_found(queryset)
 
-        # If no object is found after checking all lookup fields, raise a NotFound exception
+        # Check if the request has the necessary permissions
+        self.check_object_permissions(self.request, objs[0])
+        return objs[0]
+
+    @staticmethod
+    def raise_not_found(queryset):
         raise NotFound(
             "No %s matches the given query." % queryset.model._meta.object_name
         )
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients pick top-level fields with ?fields= and nested relations with
+    ?expand= on safe requests. The picked fields are passed to serializers in
+    the context as `sparse_fields`; the serializer decides which columns and
+    relations to load for them.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+    expandable_fields: list[str] = []
+
+    @staticmethod
+    def _split_query_param(value: str | None) -> set[str]:
+        return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+    def get_sparse_fields(self) -> set[str] | None:
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        query_params = getattr(self.request, "query_params", {})
+        if self.request.method not in SAFE_METHODS or not (
+            self.fields_query_param in query_params
+            or self.expand_query_param in query_params
+        ):
+            return None
+
+        readable_fields = {
+            name
+            for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        }
+        expandable_fields = set(self.expandable_fields)
+
+        fields = self._split_query_param(query_params.get(self.fields_query_param))
+        expand = self._split_query_param(query_params.get(self.expand_query_param))
+
+        errors = {}
+        if unknown_fields := fields - readable_fields:
+            errors[self.fields_query_param] = [
+                f"Unknown fields: {', '.join(sorted(unknown_fields))}."
+            ]
+        if unknown_expand := expand - expandable_fields:
+            errors[self.expand_query_param] = [
+                f"Unknown relations: {', '.join(sorted(unknown_expand))}."
+            ]
+        if errors:
+            raise ValidationError(errors)
+
+        self._sparse_fields = (fields or readable_fields - expandable_fields) | expand
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["sparse_fields"] = self.get_sparse_fields()
+        return context
+
+
+class SparseFieldsSerializerMixin:
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse_fields = self.context.get("sparse_fields")
+        if sparse_fields is None:
+            return fields
+
+        return {name: field for name, field in fields.items() if name in sparse_fields}
@@ -2,6 +2,9 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (
     MinValueValidator,
     MaxValueValidator,
@@ -9,12 +12,21 @@ from django.core.validators import (
     MaxLengthValidator,
 )
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Cast, Round
 from django_extensions.db import fields as extension_fields
 from file_validator.models import FileSizeValidator
 from imagekit.models import ProcessedImageField
 
 from votes.models import Vote
 
+MIN_RATING = 1
+MAX_RATING = 10
+
+
+def empty_rating_histogram() -> list[int]:
+    return [0] * MAX_RATING
+
 
 # Create your models here.
 class Product(models.Model):
@@ -26,18 +38,71 @@ class Product(models.Model):
     unit_price = models.DecimalField(
         max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal(0))]
     )
+    # unit price with the best promotion applied, maintained by products.signals
+    final_price = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, db_default=0, editable=False
+    )
     inventory = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     last_update = extension_fields.ModificationDateTimeField()
     collection = models.ForeignKey("Collection", on_delete=models.PROTECT)
     promotions = models.ManyToManyField("Promotion", blank=True)
     votes = GenericRelation(Vote)
+    likes_count = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
+    # review aggregates, maintained by products.signals
+    reviews_count = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    rating_histogram = ArrayField(
+        models.PositiveIntegerField(),
+        size=MAX_RATING,
+        default=empty_rating_histogram,
+        db_default=Value(
+            [0] * MAX_RATING, output_field=ArrayField(models.PositiveIntegerField())
+        ),
+        editable=False,
+    )
+    average_rating = models.GeneratedField(
+        expression=Case(
+            When(
+                reviews_count__gt=0,
+                then=Round(
+                    Cast(
+                        "rating_sum",
+                        models.DecimalField(max_digits=12, decimal_places=2),
+                    )
+                    / F("reviews_count"),
+                    2,
+                ),
+            ),
+            default=Value(0),
+            output_field=models.DecimalField(max_digits=4, decimal_places=2),
+        ),
+        output_field=models.DecimalField(max_digits=4, decimal_places=2),
+        db_persist=True,
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["title"]
         indexes = [
+            GinIndex(fields=["search_vector"], name="products_product_search_idx"),
+            GinIndex(
+                fields=["title"],
+                name="products_product_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
             models.Index(fields=["title"]),
             models.Index(fields=["slug"]),
-            models.Index(fields=["unit_price"]),
+            models.Index(fields=["unit_price", "id"]),
+            models.Index(fields=["final_price", "id"]),
+            models.Index(fields=["inventory", "id"]),
+            models.Index(fields=["last_update", "id"]),
+            models.Index(fields=["likes_count", "id"]),
+            models.Index(fields=["dislikes_count", "id"]),
+            models.Index(fields=["average_rating", "id"]),
+            models.Index(fields=["reviews_count", "id"]),
         ]
 
     def __str__(self) -> str:
@@ -59,6 +124,9 @@ class ProductImage(models.Model):
 
 class Collection(models.Model):
     title = models.CharField(max_length=255, unique=True)
+    products_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
 
     class Meta:
         ordering = ["title"]
@@ -87,17 +155,28 @@ class Review(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True
     )
     rating = models.PositiveIntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(10)]
+        validators=[MinValueValidator(MIN_RATING), MaxValueValidator(MAX_RATING)]
     )
     content = models.TextField(
         validators=[MinLengthValidator(10), MaxLengthValidator(1000)]
     )
     created_at = extension_fields.CreationDateTimeField()
     votes = GenericRelation(Vote)
+    likes_count = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["rating"]), models.Index(fields=["created_at"])]
+        indexes = [
+            models.Index(fields=["rating"]),
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["product", "rating", "id"]),
+            models.Index(fields=["product", "created_at", "id"]),
+            models.Index(fields=["product", "likes_count", "id"]),
+            models.Index(fields=["product", "dislikes_count", "id"]),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["product", "author"], name="one_review_for_product_per_user"
@@ -0,0 +1,47 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Round
+
+from products.models import Product
+
+PRICE_PRECISION = Decimal("0.01")
+
+
+def best_discount() -> Coalesce:
+    # a subquery instead of a join, so the price can be used in queryset.update()
+    discounts = (
+        Product.promotions.through.objects.filter(product_id=OuterRef("pk"))
+        .order_by()
+        .values("product_id")
+        .annotate(discount=Max("promotion__discount"))
+        .values("discount")
+    )
+    return Coalesce(Subquery(discounts), Value(0))
+
+
+def product_final_price() -> Round:
+    price = ExpressionWrapper(
+        F("unit_price") * (Value(100) - best_discount()) / Value(100),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    return Round(price, 2)
+
+
+def calculate_final_price(unit_price: Decimal, discount: int | None) -> Decimal:
+    # mirrors product_final_price() for a single product already in memory
+    price = Decimal(unit_price) * (100 - (discount or 0)) / 100
+    return price.quantize(PRICE_PRECISION, rounding=ROUND_HALF_UP)
+
+
+def update_final_prices(queryset: QuerySet) -> int:
+    return queryset.update(final_price=product_final_price())
@@ -0,0 +1,68 @@
+from django.db.models import Count, F, Func, OuterRef, QuerySet, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from products.models import MAX_RATING, Product, Review
+
+RATING_HISTOGRAM_SQL = f"""
+    ARRAY(
+        SELECT COUNT(review.id)::integer
+        FROM generate_series(1, {MAX_RATING}) AS bucket
+        LEFT JOIN products_review AS review
+            ON review.rating = bucket AND review.product_id = products_product.id
+        GROUP BY bucket
+        ORDER BY bucket
+    )
+"""
+
+
+class ArrayElementIncrement(Func):
+    # update() can not assign to an array subscript, so the array is rebuilt
+    # around the changed element instead
+    template = (
+        "(%(expressions)s)[:%(index)s - 1] "
+        "|| ((%(expressions)s)[%(index)s] + %(delta)s) "
+        "|| (%(expressions)s)[%(index)s + 1:]"
+    )
+    arity = 1
+
+    def __init__(self, expression, index: int, delta: int, **extra):
+        super().__init__(expression, index=int(index), delta=int(delta), **extra)
+
+
+def update_product_rating_aggregates(
+    product_id: int, added: int | None = None, removed: int | None = None
+) -> int:
+    """
+    Applies a review's rating being added and/or removed to the product's
+    aggregates in a single UPDATE.
+    """
+    reviews_count, rating_sum = F("reviews_count"), F("rating_sum")
+    rating_histogram = F("rating_histogram")
+    for rating, delta in [(added, 1), (removed, -1)]:
+        if rating is None:
+            continue
+        reviews_count += delta
+        rating_sum += delta * rating
+        rating_histogram = ArrayElementIncrement(rating_histogram, rating, delta)
+
+    return Product.objects.filter(id=product_id).update(
+        reviews_count=reviews_count,
+        rating_sum=rating_sum,
+        rating_histogram=rating_histogram,
+    )
+
+
+def rebuild_rating_aggregates(queryset: QuerySet) -> int:
+    reviews = (
+        Review.objects.filter(product_id=OuterRef("pk")).order_by().values("product_id")
+    )
+    return queryset.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count("id")).values("count")), Value(0)
+        ),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")), Value(0)
+        ),
+        rating_histogram=RawSQL(RATING_HISTOGRAM_SQL, []),
+    )
@@ -0,0 +1,38 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Cast
+
+from products.models import Collection
+
+SEARCH_CONFIG = "english"
+
+
+def product_search_vector() -> SearchVector:
+    # a subquery instead of a join, so the vector can be used in queryset.update()
+    collection_title = Subquery(
+        Collection.objects.filter(id=OuterRef("collection_id")).values("title")[:1]
+    )
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(collection_title, weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def search_products(queryset: QuerySet, text: str) -> QuerySet:
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    rank = SearchRank(F("search_vector"), query) + TrigramWordSimilarity(text, "title")
+    # real values are sent rounded to the client, double precision ones are
+    # exact, so keyset cursors compare against the rank the database sorted by
+    rank = Cast(rank, FloatField())
+
+    return (
+        queryset.filter(Q(search_vector=query) | Q(title__trigram_word_similar=text))
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "id")
+    )
@@ -1,9 +1,16 @@
+from collections import defaultdict
+from hashlib import md5
+
+from django.core.cache import cache
 from django.db import IntegrityError
+from django.db.models import QuerySet
 from rest_framework import serializers
 
+from core.caching import get_cache_generations
 from core.exceptions import Conflict
+from products.mixins import SparseFieldsSerializerMixin
 from products.models import Collection, ProductImage, Review, Product, Promotion
-from products.utils import get_product_or_404
+from products.utils import get_product_id_or_404
 
 
 class CollectionSerializer(serializers.ModelSerializer):
@@ -11,8 +18,6 @@ class CollectionSerializer(serializers.ModelSerializer):
         model = Collection
         fields = ["id", "title", "products_count"]
 
-    products_count = serializers.IntegerField(read_only=True)
-
 
 class SimpleCollectionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,8 +32,8 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         product_identifier = self.context["view"].kwargs["product_pk"]
-        product = get_product_or_404(product_identifier)
-        return ProductImage.objects.create(product=product, **validated_data)
+        product_id = get_product_id_or_404(product_identifier, self.context["request"])
+        return ProductImage.objects.create(product_id=product_id, **validated_data)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -51,10 +56,12 @@ class ReviewSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = self.context["request"].user
         product_identifier = self.context["view"].kwargs["product_pk"]
-        product = get_product_or_404(product_identifier)
+        product_id = get_product_id_or_404(product_identifier, self.context["request"])
 
         try:
-            return Review.objects.create(author=user, product=product, **validated_data)
+            return Review.objects.create(
+                author=user, product_id=product_id, **validated_data
+            )
         except IntegrityError:
             raise Conflict("You have already reviewed this product.")
 
@@ -65,7 +72,7 @@ class PromotionSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "discount"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
@@ -74,10 +81,14 @@ class ProductSerializer(serializers.ModelSerializer):
             "slug",
             "description",
             "unit_price",
+            "final_price",
             "inventory",
             "last_update",
             "likes_count",
             "dislikes_count",
+            "reviews_count",
+            "average_rating",
+            "rating_histogram",
             "collection",
             "collection_id",
             "promotions",
@@ -86,6 +97,9 @@ class ProductSerializer(serializers.ModelSerializer):
 
     likes_count = serializers.IntegerField(read_only=True)
     dislikes_count = serializers.IntegerField(read_only=True)
+    average_rating = serializers.DecimalField(
+        max_digits=4, decimal_places=2, read_only=True
+    )
 
     collection = SimpleCollectionSerializer(read_only=True)
     collection_id = serializers.IntegerField(write_only=True)
@@ -104,6 +118,202 @@ class ProductSerializer(serializers.ModelSerializer):
         return collection_id
 
 
+class ProductValuesSerializer:
+    """
+    Read-only counterpart of ProductSerializer. It renders the same output from
+    values() rows and per-page lookup maps, without instantiating models or
+    binding serializer fields for every row.
+
+    Rendered products are cached per object, see to_cached_representation().
+    """
+
+    # columns that change whenever a product's own fields do, queryset
+    # updates of counters and prices skip last_update
+    version_fields = [
+        "last_update",
+        "final_price",
+        "inventory",
+        "likes_count",
+        "dislikes_count",
+        "rating_sum",
+        "reviews_count",
+        # review edits can move ratings between buckets and keep the sum
+        "rating_histogram",
+        "collection_id",
+    ]
+    # nested field name -> model whose writes change its output
+    fragment_dependencies = {
+        "collection": Collection,
+        "promotions": Promotion,
+        "images": ProductImage,
+    }
+    fragment_cache_timeout = 60 * 60 * 24
+
+    def __init__(self, context: dict | None = None):
+        self.context = context or {}
+        self.fields = {
+            name: field
+            for name, field in ProductSerializer(context=self.context).fields.items()
+            if not field.write_only
+        }
+
+        # only fields whose output differs from the database value are converted
+        self.converters = {
+            name: field.to_representation
+            for name, field in self.fields.items()
+            if isinstance(field, serializers.DecimalField | serializers.DateTimeField)
+        }
+        self.sources = [(name, field.source) for name, field in self.fields.items()]
+
+    def get_queryset(self, queryset: QuerySet) -> QuerySet:
+        columns = {"id"}
+        for name, field in self.fields.items():
+            if name == "collection":
+                columns.add("collection_id")
+            elif not isinstance(field, serializers.BaseSerializer):
+                columns.add(field.source)
+
+        # annotations stay selected so paginators can read ordering values
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values(*columns, *queryset.query.annotations)
+        )
+
+    def get_page_queryset(self, queryset: QuerySet) -> QuerySet:
+        # only what ordering, pagination and fragment keys need
+        ordering = {
+            field.lstrip("-")
+            for field in queryset.query.order_by
+            if isinstance(field, str) and field.lstrip("-") not in ["pk", "?"]
+        }
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values("id", *self.version_fields, *ordering, *queryset.query.annotations)
+        )
+
+    def get_fragment_cache_keys(self, rows: list[dict]) -> dict[int, str]:
+        dependencies = [
+            model
+            for name, model in self.fragment_dependencies.items()
+            if name in self.fields
+        ]
+        request = self.context.get("request")
+        # image urls are absolute, so fragments are only shared per host
+        common = [
+            sorted(self.fields),
+            get_cache_generations(dependencies),
+            request.build_absolute_uri("/") if request is not None else None,
+        ]
+
+        keys = {}
+        for row in rows:
+            version = [row[field] for field in self.version_fields]
+            digest = md5(repr([*common, version]).encode(), usedforsecurity=False)
+            keys[row["id"]] = f"products:fragments:{row['id']}:{digest.hexdigest()}"
+        return keys
+
+    def get_collections(self, rows: list[dict]) -> dict[int, dict]:
+        collection_ids = {row["collection_id"] for row in rows}
+        return {
+            collection_id: {"id": collection_id, "title": title}
+            for collection_id, title in Collection.objects.filter(
+                id__in=collection_ids
+            ).values_list("id", "title")
+        }
+
+    @staticmethod
+    def get_promotions(product_ids: list[int]) -> dict[int, list[dict]]:
+        promotions = defaultdict(list)
+        rows = (
+            Product.promotions.through.objects.filter(product_id__in=product_ids)
+            .order_by("promotion_id")
+            .values_list(
+                "product_id", "promotion_id", "promotion__name", "promotion__discount"
+            )
+        )
+        for product_id, promotion_id, name, discount in rows:
+            promotions[product_id].append(
+                {"id": promotion_id, "name": name, "discount": discount}
+            )
+        return promotions
+
+    def get_images(self, product_ids: list[int]) -> dict[int, list[dict]]:
+        storage = ProductImage._meta.get_field("image").storage
+        request = self.context.get("request")
+
+        images = defaultdict(list)
+        rows = (
+            ProductImage.objects.filter(product_id__in=product_ids)
+            .order_by("id")
+            .values_list("product_id", "id", "image")
+        )
+        for product_id, image_id, name in rows:
+            url = None
+            if name:
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+            images[product_id].append({"id": image_id, "image": url})
+        return images
+
+    def to_representation(self, rows) -> list[dict]:
+        rows = list(rows)
+        product_ids = [row["id"] for row in rows]
+
+        # nested field name -> (row key, lookup map, default)
+        relations = {}
+        if "collection" in self.fields:
+            relations["collection"] = (
+                "collection_id",
+                self.get_collections(rows),
+                None,
+            )
+        if "promotions" in self.fields:
+            relations["promotions"] = ("id", self.get_promotions(product_ids), [])
+        if "images" in self.fields:
+            relations["images"] = ("id", self.get_images(product_ids), [])
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source in self.sources:
+                if name in relations:
+                    key, values, default = relations[name]
+                    item[name] = values.get(row[key], default)
+                elif name in self.converters:
+                    item[name] = self.converters[name](row[source])
+                else:
+                    item[name] = row[source]
+            data.append(item)
+
+        return data
+
+    def to_cached_representation(self, rows) -> list[dict]:
+        """
+        Renders rows of get_page_queryset() from cached per-product fragments.
+        Only products without an up to date fragment are loaded and rendered,
+        so pages of different filters and orderings share their work.
+        """
+        rows = list(rows)
+        keys = self.get_fragment_cache_keys(rows)
+        fragments = cache.get_many(keys.values())
+
+        missing_ids = [
+            product_id for product_id, key in keys.items() if key not in fragments
+        ]
+        if missing_ids:
+            queryset = self.get_queryset(Product.objects.filter(id__in=missing_ids))
+            rendered = {item["id"]: item for item in self.to_representation(queryset)}
+            rendered = {keys[product_id]: item for product_id, item in rendered.items()}
+            cache.set_many(rendered, timeout=self.fragment_cache_timeout)
+            fragments.update(rendered)
+
+        # products deleted since the page was read are left out
+        return [fragments[key] for key in keys.values() if key in fragments]
+
+
 class SimpleProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
@@ -0,0 +1,223 @@
+from django.db.models import Max
+from django.db.models.signals import (
+    m2m_changed,
+    post_save,
+    pre_save,
+    post_delete,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.caching import bump_cache_generation
+from core.micro_cache import purge_surrogate_keys
+from products.models import Product, Collection, Promotion, ProductImage, Review
+from products.pricing import calculate_final_price, update_final_prices
+from products.ratings import update_product_rating_aggregates
+from products.search import product_search_vector
+from products.utils import (
+    invalidate_product_id_cache,
+    update_collection_products_count,
+)
+from votes.models import Vote
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance: Product, **kwargs):
+    Product.objects.filter(id=instance.id).update(search_vector=product_search_vector())
+
+
+@receiver(pre_save, sender=Collection)
+def remember_previous_collection_values(sender, instance: Collection, **kwargs):
+    instance._previous_values = (
+        Collection.objects.filter(pk=instance.pk).values("title").first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Collection)
+def update_collection_products_search_vector(sender, instance: Collection, **kwargs):
+    # product vectors only hold the collection title
+    previous_values = getattr(instance, "_previous_values", None)
+    if previous_values is not None and previous_values["title"] != instance.title:
+        Product.objects.filter(collection_id=instance.id).update(
+            search_vector=product_search_vector()
+        )
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_product_values(sender, instance: Product, **kwargs):
+    instance._previous_values = (
+        Product.objects.filter(pk=instance.pk)
+        .annotate(best_discount=Max("promotions__discount"))
+        .values("slug", "collection_id", "best_discount")
+        .first()
+        if instance.pk is not None
+        else None
+    )
+
+    best_discount = (instance._previous_values or {}).get("best_discount")
+    instance.final_price = calculate_final_price(instance.unit_price, best_discount)
+
+    previous_slug = (instance._previous_values or {}).get("slug")
+    if previous_slug is not None and previous_slug != instance.slug:
+        invalidate_product_id_cache(previous_slug)
+
+
+@receiver(post_save, sender=Product)
+def update_collection_products_count_on_save(sender, instance: Product, **kwargs):
+    previous_values = getattr(instance, "_previous_values", None)
+    previous_collection_id = (previous_values or {}).get("collection_id")
+    if previous_collection_id == instance.collection_id:
+        return
+
+    if previous_collection_id is not None:
+        update_collection_products_count(previous_collection_id, -1)
+    update_collection_products_count(instance.collection_id, 1)
+
+
+@receiver(post_delete, sender=Product)
+def update_collection_products_count_on_delete(sender, instance: Product, **kwargs):
+    update_collection_products_count(instance.collection_id, -1)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_id_cache_on_change(sender, instance: Product, **kwargs):
+    invalidate_product_id_cache(instance.pk, instance.slug)
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def update_final_price_on_promotions_change(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+):
+    if not reverse:
+        if action in ["post_add", "post_remove", "post_clear"]:
+            update_final_prices(Product.objects.filter(id=instance.id))
+        return
+
+    # the instance is a promotion, the affected products have to be collected
+    # before a clear since the through rows are gone afterwards
+    if action == "pre_clear":
+        instance._cleared_product_ids = list(
+            instance.product_set.values_list("id", flat=True)
+        )
+    elif action in ["post_add", "post_remove"]:
+        update_final_prices(Product.objects.filter(id__in=pk_set))
+    elif action == "post_clear":
+        product_ids = getattr(instance, "_cleared_product_ids", [])
+        update_final_prices(Product.objects.filter(id__in=product_ids))
+
+
+@receiver(post_save, sender=Promotion)
+def update_promotion_products_final_price(
+    sender, instance: Promotion, created: bool, **kwargs
+):
+    if not created:
+        update_final_prices(Product.objects.filter(promotions=instance))
+
+
+@receiver(pre_delete, sender=Promotion)
+def remember_promotion_product_ids(sender, instance: Promotion, **kwargs):
+    instance._product_ids = list(instance.product_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Promotion)
+def update_final_price_on_promotion_delete(sender, instance: Promotion, **kwargs):
+    product_ids = getattr(instance, "_product_ids", [])
+    update_final_prices(Product.objects.filter(id__in=product_ids))
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review_values(sender, instance: Review, **kwargs):
+    instance._previous_values = (
+        Review.objects.filter(pk=instance.pk).values("product_id", "rating").first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_product_ratings_on_review_save(sender, instance: Review, **kwargs):
+    previous_values = getattr(instance, "_previous_values", None)
+    if previous_values is None:
+        update_product_rating_aggregates(instance.product_id, added=instance.rating)
+    elif previous_values["product_id"] != instance.product_id:
+        update_product_rating_aggregates(
+            previous_values["product_id"], removed=previous_values["rating"]
+        )
+        update_product_rating_aggregates(instance.product_id, added=instance.rating)
+    elif previous_values["rating"] != instance.rating:
+        update_product_rating_aggregates(
+            instance.product_id,
+            added=instance.rating,
+            removed=previous_values["rating"],
+        )
+
+
+@receiver(post_delete, sender=Review)
+def update_product_ratings_on_review_delete(sender, instance: Review, **kwargs):
+    update_product_rating_aggregates(instance.product_id, removed=instance.rating)
+
+
+def bump_catalog_cache_generation(sender, **kwargs):
+    bump_cache_generation(sender)
+
+
+# cached catalog responses are keyed by the generations of these models
+for model in [Product, Collection, Promotion, ProductImage, Review, Vote]:
+    post_save.connect(bump_catalog_cache_generation, sender=model)
+    post_delete.connect(bump_catalog_cache_generation, sender=model)
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def bump_catalog_cache_generation_on_promotions_change(sender, action: str, **kwargs):
+    if action.startswith("post_"):
+        bump_cache_generation(Product, Promotion)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def purge_product_micro_cache(sender, instance: Product, **kwargs):
+    keys = [
+        f"product-{instance.id}",
+        f"product-{instance.slug}",
+        f"collection-{instance.collection_id}",
+        "product-list",
+        "collection-list",
+    ]
+    previous_values = getattr(instance, "_previous_values", None)
+    if previous_values is not None:
+        keys += [
+            f"product-{previous_values['slug']}",
+            f"collection-{previous_values['collection_id']}",
+        ]
+    purge_surrogate_keys(*keys)
+
+
+@receiver([post_save, post_delete], sender=Collection)
+def purge_collection_micro_cache(sender, instance: Collection, **kwargs):
+    purge_surrogate_keys(f"collection-{instance.id}", "collection-list", "product-list")
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def purge_promotion_micro_cache(sender, instance: Promotion, **kwargs):
+    purge_surrogate_keys(f"promotion-{instance.id}", "product-list")
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def purge_micro_cache_on_promotions_change(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        keys = [f"promotion-{instance.id}"]
+        keys += [f"product-{product_id}" for product_id in pk_set or []]
+    else:
+        keys = [f"product-{instance.id}"]
+    purge_surrogate_keys(*keys, "product-list")
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=ProductImage)
+def purge_product_children_micro_cache(sender, instance, **kwargs):
+    purge_surrogate_keys(f"product-{instance.product_id}", "product-list")
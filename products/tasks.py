@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from core.caching import RESPONSE_CACHE_TIMEOUT
+from products.warmup import (
+    WARMUP_DONE_CACHE_KEY,
+    acquire_warmup_lock,
+    get_warmup_config,
+    get_warmup_paths,
+    release_warmup_lock,
+    warm_up,
+)
+
+
+@shared_task
+def warm_up_catalog_cache(force: bool = False):
+    # the marker goes away with the cache and expires with the entries it
+    # warmed up, so a restarted or aged-out cache is warmed up on the next run
+    # and a warm one is left alone
+    if not force and cache.get(WARMUP_DONE_CACHE_KEY):
+        return
+    # a run can outlast the beat interval, the next ones leave it alone
+    token = acquire_warmup_lock()
+    if token is None:
+        return
+
+    try:
+        config = get_warmup_config()
+        paths = get_warmup_paths(config["PAGES"], config["TOP_PRODUCTS"])
+        warm_up(paths, config["BASE_URL"], config["CONCURRENCY"], config["RATE"])
+        cache.set(WARMUP_DONE_CACHE_KEY, True, timeout=RESPONSE_CACHE_TIMEOUT)
+    finally:
+        release_warmup_lock(token)
@@ -16,7 +16,7 @@ def product_image(product, create_image_file) -> ProductImage:
 
 @pytest.fixture
 def product_review(product) -> Review:
-    review = baker.make(Review, product=product)
+    review = baker.make(Review, product=product, rating=5)
     return review
 
 
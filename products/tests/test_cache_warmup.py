@@ -0,0 +1,130 @@
+import pytest
+import redis
+from django.core.management import call_command
+from model_bakery import baker
+
+from products import warmup
+from products.models import Product
+from products.tasks import warm_up_catalog_cache
+
+
+@pytest.fixture
+def warmup_redis(settings, monkeypatch):
+    settings.CACHE_WARMUP = {
+        **settings.CACHE_WARMUP,
+        "REDIS_URL": "redis://redis:6379/15",
+    }
+    monkeypatch.setattr(warmup, "_redis", None)
+    client = warmup.get_redis()
+    try:
+        client.flushdb()
+    except redis.RedisError:
+        pytest.skip("redis is not available")
+    yield client
+    client.flushdb()
+    monkeypatch.setattr(warmup, "_redis", None)
+
+
+@pytest.fixture
+def fetched_urls(monkeypatch) -> list[str]:
+    urls = []
+
+    def fetch(url):
+        urls.append(url)
+        return 200
+
+    monkeypatch.setattr(warmup, "fetch", fetch)
+    return urls
+
+
+@pytest.mark.django_db
+class TestWarmupPaths:
+    def test_covers_collections_orderings_and_pages(self, collection):
+        baker.make(Product, collection=collection, _quantity=21)
+        collection.refresh_from_db()
+
+        paths = warmup.get_warmup_paths(pages=5, top_products=0)
+
+        assert "/api/collections/" in paths
+        assert f"/api/collections/{collection.id}/" in paths
+        assert f"/api/products/?collection={collection.id}" in paths
+        assert f"/api/products/?collection={collection.id}&page=2" in paths
+        assert (
+            f"/api/products/?collection={collection.id}&ordering=-final_price&page=2"
+            in paths
+        )
+        # a third page would be empty
+        assert not any("page=3" in path for path in paths)
+
+    def test_most_reviewed_products_are_used_without_traffic(self, collection):
+        products = baker.make(Product, collection=collection, _quantity=3)
+        Product.objects.filter(id=products[1].id).update(reviews_count=5)
+
+        identifiers = warmup.get_top_product_identifiers(2)
+
+        assert identifiers == [str(products[1].id), str(products[0].id)]
+
+    def test_most_viewed_products_come_first(self, product, warmup_redis):
+        for identifier in ["a", "b", "b"]:
+            warmup.record_product_view(identifier)
+        warmup.flush_product_views()
+
+        assert warmup.get_top_product_identifiers(1) == ["b"]
+
+    def test_product_detail_views_are_recorded(self, api_client, product, warmup_redis):
+        api_client.get(f"/api/products/{product.slug}/")
+        warmup.flush_product_views()
+
+        assert warmup.get_top_product_identifiers(5) == [product.slug]
+
+    def test_warmup_requests_are_not_recorded(self, api_client, product, warmup_redis):
+        api_client.get(
+            f"/api/products/{product.slug}/",
+            headers={warmup.WARMUP_HEADER: "1"},
+        )
+        warmup.flush_product_views()
+
+        assert warmup.get_top_product_identifiers(5) == [str(product.id)]
+
+
+@pytest.mark.django_db
+class TestWarmUp:
+    def test_requests_every_path(self, fetched_urls):
+        statuses = warmup.warm_up(["/a/", "/b/"], "http://nginx", 2, rate=0)
+
+        assert sorted(fetched_urls) == ["http://nginx/a/", "http://nginx/b/"]
+        assert statuses == {200: 2}
+
+    def test_requests_are_rate_limited(self, fetched_urls, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(warmup, "sleep", sleeps.append)
+        monkeypatch.setattr(warmup, "monotonic", lambda: 100.0)
+
+        warmup.warm_up(["/a/", "/b/", "/c/"], "http://nginx", 1, rate=10)
+
+        assert sorted(sleeps) == pytest.approx([0, 0.1, 0.2])
+
+    def test_task_skips_a_warm_cache(self, collection, locmem_cache, fetched_urls):
+        warm_up_catalog_cache()
+        fetched_urls.clear()
+
+        warm_up_catalog_cache()
+
+        assert fetched_urls == []
+
+    def test_task_skips_while_another_run_holds_the_lock(
+        self, collection, locmem_cache, fetched_urls
+    ):
+        token = warmup.acquire_warmup_lock()
+
+        warm_up_catalog_cache()
+
+        assert fetched_urls == []
+        warmup.release_warmup_lock(token)
+        warm_up_catalog_cache()
+        assert fetched_urls != []
+
+    def test_command_warms_up_catalog(self, collection, fetched_urls):
+        call_command("warm_up_cache", "--base-url", "http://nginx", "--rate", "0")
+
+        assert "http://nginx/api/collections/" in fetched_urls
@@ -0,0 +1,308 @@
+import pytest
+from django.core.cache import caches
+from model_bakery import baker
+from rest_framework import status
+
+from core import caching
+from products.models import Product, Promotion, Review
+from votes.models import Vote
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_repeated_list_is_served_from_cache(
+        self, api_client, product, locmem_cache, django_assert_num_queries
+    ):
+        api_client.get("/api/products/")
+
+        with django_assert_num_queries(0):
+            response = api_client.get("/api/products/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["id"] == product.id
+
+    def test_response_entries_expire(
+        self, api_client, product, locmem_cache, monkeypatch
+    ):
+        # entries under old generations are never read again and must age out
+        backend = caches["default"]
+        timeouts = []
+        set_many = backend.set_many
+
+        def record_set_many(data, timeout, **kwargs):
+            timeouts.append(timeout)
+            return set_many(data, timeout, **kwargs)
+
+        monkeypatch.setattr(backend, "set_many", record_set_many)
+        api_client.get("/api/products/")
+
+        # the product fragments are written too
+        assert caching.RESPONSE_CACHE_TIMEOUT in timeouts
+        assert None not in timeouts
+
+    def test_product_write_refreshes_product_responses(
+        self, api_client, product, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        api_client.get(f"/api/products/{product.id}/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.title = "Renamed product"
+            product.save()
+        response = api_client.get(f"/api/products/{product.id}/")
+
+        assert response.data["title"] == "Renamed product"
+
+    def test_review_write_refreshes_product_responses(
+        self, api_client, product, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        api_client.get("/api/products/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Review, product=product, rating=6)
+        response = api_client.get("/api/products/")
+
+        assert response.data["results"][0]["reviews_count"] == 1
+
+    def test_product_write_refreshes_collection_responses(
+        self, api_client, collection, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        api_client.get(f"/api/collections/{collection.id}/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Product, collection=collection)
+        response = api_client.get(f"/api/collections/{collection.id}/")
+
+        assert response.data["products_count"] == 1
+
+    def test_stale_list_is_served_while_another_request_recomputes(
+        self,
+        api_client,
+        product,
+        locmem_cache,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+        django_assert_num_queries,
+    ):
+        previous_title = product.title
+        api_client.get("/api/products/")
+        with django_capture_on_commit_callbacks(execute=True):
+            product.title = "Renamed product"
+            product.save()
+        monkeypatch.setattr(caching, "acquire_response_lock", lambda cache_key: None)
+
+        with django_assert_num_queries(0):
+            response = api_client.get("/api/products/")
+
+        assert response.data["results"][0]["title"] == previous_title
+        assert caching.get_response_cache_metrics()["stale"] == 1
+
+    def test_waiting_request_gets_the_lock_holders_response(
+        self, api_client, product, locmem_cache, monkeypatch
+    ):
+        cache_keys = []
+        get_response_cache_keys = caching.get_response_cache_keys
+
+        def record_cache_keys(view):
+            cache_keys.append(get_response_cache_keys(view))
+            return cache_keys[-1]
+
+        def finish_other_request(seconds):
+            locmem_cache.set(
+                cache_keys[0][0], {"data": {"title": "Coalesced"}, "headers": {}}
+            )
+
+        monkeypatch.setattr(caching, "get_response_cache_keys", record_cache_keys)
+        monkeypatch.setattr(caching, "acquire_response_lock", lambda cache_key: None)
+        monkeypatch.setattr(caching, "sleep", finish_other_request)
+
+        response = api_client.get(f"/api/products/{product.id}/")
+
+        assert response.data["title"] == "Coalesced"
+        assert caching.get_response_cache_metrics()["coalesced"] == 1
+
+    def test_waiting_stops_when_lock_holder_stores_nothing(
+        self, api_client, locmem_cache, monkeypatch
+    ):
+        sleeps = []
+        # the lock holder answered 404 and released the lock without an entry
+        monkeypatch.setattr(caching, "acquire_response_lock", lambda cache_key: None)
+        monkeypatch.setattr(caching, "sleep", sleeps.append)
+
+        response = api_client.get("/api/products/missing-product/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert len(sleeps) == 1
+
+
+@pytest.mark.django_db
+class TestResponseCacheMetrics:
+    def test_if_user_is_not_admin_returns_403(self, authenticated_api_client):
+        response = authenticated_api_client.get("/api/metrics/cache/")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_if_user_is_admin_returns_200(self, admin_api_client, locmem_cache):
+        admin_api_client.get("/api/collections/")
+        admin_api_client.get("/api/collections/")
+
+        response = admin_api_client.get("/api/metrics/cache/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["hits"] == 1
+        assert response.data["misses"] == 1
+        assert response.data["shared_hit_ratio"] == 0.5
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    def test_matching_etag_returns_304_after_one_query(
+        self, api_client, product, django_assert_num_queries
+    ):
+        etag = api_client.get(f"/api/products/{product.slug}/")["ETag"]
+
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                f"/api/products/{product.slug}/", HTTP_IF_NONE_MATCH=etag
+            )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+    def test_etag_changes_when_vote_counters_change(self, api_client, product):
+        etag = api_client.get(f"/api/products/{product.id}/")["ETag"]
+        Product.objects.filter(id=product.id).update(likes_count=1)
+
+        response = api_client.get(
+            f"/api/products/{product.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_list_etag_depends_on_filters(self, api_client, product):
+        filtered_response = api_client.get("/api/products/?inventory_min=1000")
+
+        response = api_client.get(
+            "/api/products/", HTTP_IF_NONE_MATCH=filtered_response["ETag"]
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_etag_changes_after_vote(
+        self,
+        authenticated_api_client,
+        product,
+        locmem_cache,
+        django_capture_on_commit_callbacks,
+    ):
+        etag = authenticated_api_client.get("/api/products/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_api_client.post(
+                f"/api/products/{product.id}/vote/", {"value": Vote.LIKE}
+            )
+        response = authenticated_api_client.get(
+            "/api/products/", HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["likes_count"] == 1
+
+    def test_if_modified_since_is_ignored(self, api_client, product):
+        response = api_client.get("/api/products/")
+
+        assert "Last-Modified" not in response
+
+        response = api_client.get(
+            "/api/products/", HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_returns_304_without_queries(
+        self, api_client, product, django_assert_num_queries
+    ):
+        etag = api_client.get("/api/products/")["ETag"]
+
+        with django_assert_num_queries(0):
+            response = api_client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_collection_list_returns_304(self, api_client, collection):
+        etag = api_client.get("/api/collections/")["ETag"]
+
+        response = api_client.get("/api/collections/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_cached_entry_answers_conditional_request_without_queries(
+        self, api_client, collection, locmem_cache, django_assert_num_queries
+    ):
+        etag = api_client.get(f"/api/collections/{collection.id}/")["ETag"]
+
+        with django_assert_num_queries(0):
+            response = api_client.get(
+                f"/api/collections/{collection.id}/", HTTP_IF_NONE_MATCH=etag
+            )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestProductFragmentCache:
+    def test_other_orderings_reuse_rendered_products(
+        self, api_client, product, locmem_cache, django_assert_num_queries
+    ):
+        api_client.get("/api/products/?ordering=title")
+
+        # only the id page, the count is cached too
+        with django_assert_num_queries(1):
+            response = api_client.get("/api/products/?ordering=-title")
+
+        assert response.data["results"][0]["id"] == product.id
+        assert response.data["results"][0]["collection"]["id"] == product.collection_id
+
+    def test_counter_update_rerenders_product(self, api_client, product, locmem_cache):
+        api_client.get("/api/products/?ordering=title")
+
+        Product.objects.filter(id=product.id).update(likes_count=3)
+        response = api_client.get("/api/products/?ordering=-title")
+
+        assert response.data["results"][0]["likes_count"] == 3
+
+    def test_rating_histogram_update_rerenders_product(
+        self, api_client, product, locmem_cache
+    ):
+        histogram = [0, 1, 0, 1, 0, 0, 0, 0, 0, 0]
+        Product.objects.filter(id=product.id).update(
+            rating_sum=6, reviews_count=2, rating_histogram=histogram
+        )
+        api_client.get("/api/products/?ordering=title")
+
+        # ratings 2 and 4 edited to 3 and 3, the sum and count stay the same
+        histogram = [0, 0, 2, 0, 0, 0, 0, 0, 0, 0]
+        Product.objects.filter(id=product.id).update(rating_histogram=histogram)
+        response = api_client.get("/api/products/?ordering=-title")
+
+        assert response.data["results"][0]["rating_histogram"] == histogram
+
+    def test_promotion_change_rerenders_product(
+        self, api_client, product, locmem_cache, django_capture_on_commit_callbacks
+    ):
+        promotion = baker.make(Promotion, discount=10)
+        api_client.get("/api/products/?ordering=title")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.promotions.add(promotion)
+        response = api_client.get("/api/products/?ordering=-title")
+
+        assert response.data["results"][0]["promotions"][0]["id"] == promotion.id
+
+    def test_sparse_fields_get_their_own_fragments(
+        self, api_client, product, locmem_cache
+    ):
+        api_client.get("/api/products/?fields=id")
+        response = api_client.get("/api/products/?fields=id,title")
+
+        assert response.data["results"][0] == {"id": product.id, "title": product.title}
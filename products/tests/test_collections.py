@@ -1,7 +1,8 @@
 import pytest
+from model_bakery import baker
 from rest_framework import status
 
-from products.models import Collection
+from products.models import Collection, Product
 from products.serializers import CollectionSerializer
 
 URL = "/api/collections/"
@@ -21,12 +22,32 @@ class TestListCollection:
 
         response = api_client.get(URL)
         results = response.data["results"]
-        results[0].pop("products_count")
 
         assert response.status_code == status.HTTP_200_OK
         assert len(results) == 1
         assert results[0] == serialized_collection
 
+    def test_products_count_is_maintained(self, api_client, collection):
+        other_collection = baker.make(Collection)
+        products = baker.make(Product, collection=collection, _quantity=3)
+        products[0].collection = other_collection
+        products[0].save()
+        products[1].delete()
+
+        response = api_client.get(URL)
+        counts = {row["id"]: row["products_count"] for row in response.data["results"]}
+
+        assert counts == {collection.id: 1, other_collection.id: 1}
+
+    def test_list_does_not_load_products(
+        self, api_client, collection, django_assert_num_queries
+    ):
+        baker.make(Product, collection=collection, _quantity=3)
+
+        # the planner estimate, the count and the page
+        with django_assert_num_queries(3):
+            api_client.get(URL)
+
 
 @pytest.mark.django_db
 class TestCreateCollection:
@@ -73,7 +94,6 @@ class TestRetrieveCollection:
         serialized_collection = CollectionSerializer(collection).data
 
         response = api_client.get(URL + f"{collection.id}/")
-        response.data.pop("products_count")
 
         assert response.status_code == status.HTTP_200_OK
         assert response.data == serialized_collection
@@ -0,0 +1,48 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from products.models import Collection, Product, Review
+from votes.models import Vote
+
+
+@pytest.mark.django_db
+class TestRebuildVoteCounters:
+    def test_counters_are_recalculated_from_votes(self, product):
+        baker.make(Vote, content_object=product, value=Vote.LIKE, _quantity=2)
+        baker.make(Vote, content_object=product, value=Vote.DISLIKE)
+        Product.objects.filter(id=product.id).update(likes_count=10, dislikes_count=10)
+
+        call_command("rebuild_vote_counters")
+        product.refresh_from_db()
+
+        assert product.likes_count == 2
+        assert product.dislikes_count == 1
+
+
+@pytest.mark.django_db
+class TestRebuildCollectionCounters:
+    def test_counters_are_recalculated_from_products(self, collection):
+        baker.make(Product, collection=collection, _quantity=2)
+        Collection.objects.filter(id=collection.id).update(products_count=10)
+
+        call_command("rebuild_collection_counters")
+        collection.refresh_from_db()
+
+        assert collection.products_count == 2
+
+
+@pytest.mark.django_db
+class TestRebuildRatingAggregates:
+    def test_aggregates_are_recalculated_from_reviews(self, product):
+        baker.make(Review, product=product, rating=iter([3, 3, 7]), _quantity=3)
+        Product.objects.filter(id=product.id).update(
+            reviews_count=0, rating_sum=0, rating_histogram=[0] * 10
+        )
+
+        call_command("rebuild_rating_aggregates")
+        product.refresh_from_db()
+
+        assert product.reviews_count == 3
+        assert product.rating_sum == 13
+        assert product.rating_histogram == [0, 0, 2, 0, 0, 0, 1, 0, 0, 0]
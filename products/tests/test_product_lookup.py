@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from products.utils import get_product_id_or_404
+
+
+def count_product_lookups(context: CaptureQueriesContext) -> int:
+    return sum(
+        query["sql"].startswith('SELECT "products_product"."slug"')
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+class TestProductLookup:
+    def test_nested_create_looks_product_up_once(
+        self, authenticated_api_client, product
+    ):
+        payload = {"rating": 5, "content": "Some test review content."}
+
+        with CaptureQueriesContext(connection) as context:
+            response = authenticated_api_client.post(
+                f"/api/products/{product.slug}/reviews/", payload
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert count_product_lookups(context) == 1
+
+    def test_cached_lookup_skips_database(self, api_client, product, locmem_cache):
+        api_client.get(f"/api/products/{product.slug}/reviews/")
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(f"/api/products/{product.slug}/reviews/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert count_product_lookups(context) == 0
+
+    def test_deleted_product_is_removed_from_cache(
+        self, api_client, product, locmem_cache
+    ):
+        api_client.get(f"/api/products/{product.id}/reviews/")
+
+        product.delete()
+        response = api_client.get(f"/api/products/{product.id}/reviews/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_numeric_identifier_prefers_id_over_slug(self, product, collection):
+        other_product = type(product).objects.create(
+            title=str(product.id), unit_price=1, collection=collection
+        )
+
+        assert other_product.slug == str(product.id)
+        assert get_product_id_or_404(str(product.id)) == product.id
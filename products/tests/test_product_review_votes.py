@@ -57,6 +57,7 @@ class TestCreateProductReviewVote:
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data["value"] == payload["value"]
         assert Review.objects.get(id=product_review.id).votes.filter(**payload).exists()
+        assert Review.objects.get(id=product_review.id).likes_count == 1
 
 
 @pytest.mark.django_db
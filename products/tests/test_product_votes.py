@@ -2,6 +2,8 @@ import pytest
 from rest_framework import status
 
 from products.models import Product
+from votes.models import Vote
+from votes.views import VoteView
 
 
 @pytest.mark.django_db
@@ -44,6 +46,17 @@ class TestCreateProductVote:
         assert response.data["value"] == payload["value"]
         assert Product.objects.get(id=product.id).votes.filter(**payload).exists()
 
+    def test_if_vote_is_created_counter_is_incremented(
+        self, authenticated_api_client, product
+    ):
+        payload = {"value": -1}
+
+        authenticated_api_client.post(f"/api/products/{product.id}/vote/", payload)
+        product.refresh_from_db()
+
+        assert product.likes_count == 0
+        assert product.dislikes_count == 1
+
 
 @pytest.mark.django_db
 class TestRetrieveProductVote:
@@ -120,6 +133,40 @@ class TestUpdateProductVote:
             Product.objects.get(id=product.id).votes.filter(**update_payload).exists()
         )
 
+    def test_if_vote_is_changed_counters_are_moved(
+        self, authenticated_api_client, product
+    ):
+        create_payload = {"value": 1}
+        authenticated_api_client.post(
+            f"/api/products/{product.id}/vote/", create_payload
+        )
+
+        update_payload = {"value": -1}
+        authenticated_api_client.put(
+            f"/api/products/{product.id}/vote/", update_payload
+        )
+        product.refresh_from_db()
+
+        assert product.likes_count == 0
+        assert product.dislikes_count == 1
+
+    def test_if_vote_changed_concurrently_counters_are_moved_once(
+        self, authenticated_api_client, product, monkeypatch
+    ):
+        url = f"/api/products/{product.id}/vote/"
+        authenticated_api_client.post(url, {"value": 1})
+        stale_vote = Vote.objects.get()
+        authenticated_api_client.put(url, {"value": -1})
+
+        # a request that loaded the vote before the first update committed
+        monkeypatch.setattr(VoteView, "get_object", lambda view: stale_vote)
+        response = authenticated_api_client.put(url, {"value": -1})
+        product.refresh_from_db()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert product.likes_count == 0
+        assert product.dislikes_count == 1
+
 
 @pytest.mark.django_db
 class TestDeleteProductVote:
@@ -150,3 +197,31 @@ class TestDeleteProductVote:
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
         assert not Product.objects.get(id=product.id).votes.filter(**payload).exists()
+
+    def test_if_vote_is_deleted_counter_is_decremented(
+        self, authenticated_api_client, product
+    ):
+        payload = {"value": 1}
+        authenticated_api_client.post(f"/api/products/{product.id}/vote/", payload)
+
+        authenticated_api_client.delete(f"/api/products/{product.id}/vote/")
+        product.refresh_from_db()
+
+        assert product.likes_count == 0
+        assert product.dislikes_count == 0
+
+    def test_if_vote_deleted_concurrently_returns_404(
+        self, authenticated_api_client, product, monkeypatch
+    ):
+        url = f"/api/products/{product.id}/vote/"
+        authenticated_api_client.post(url, {"value": 1})
+        stale_vote = Vote.objects.get()
+        authenticated_api_client.delete(url)
+
+        # a request that loaded the vote before the first delete committed
+        monkeypatch.setattr(VoteView, "get_object", lambda view: stale_vote)
+        response = authenticated_api_client.delete(url)
+        product.refresh_from_db()
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert product.likes_count == 0
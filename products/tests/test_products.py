@@ -1,7 +1,15 @@
+import json
+from base64 import urlsafe_b64encode
+from decimal import Decimal
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
 from rest_framework import status
 
-from products.models import Product
+from products.models import Product, Collection, Promotion, Review
+from products.serializers import ProductSerializer
 
 URL = "/api/products/"
 
@@ -23,6 +31,301 @@ class TestListProducts:
         assert len(results) == 1
         assert results[0]["title"] == product.title
 
+    @pytest.mark.parametrize(
+        "ordering",
+        ["title", "-unit_price", "likes_count", "final_price", "-last_update"],
+    )
+    def test_cursor_pagination_walks_every_product_once(
+        self, api_client, collection, ordering
+    ):
+        products = baker.make(
+            Product, collection=collection, unit_price=10, _quantity=7
+        )
+
+        ids = []
+        url = URL + f"?pagination=cursor&page_size=3&ordering={ordering}"
+        while url is not None:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            ids += [result["id"] for result in response.data["results"]]
+            url = response.data["next"]
+
+        assert sorted(ids) == sorted(product.id for product in products)
+
+    def test_response_matches_product_serializer(self, api_client, product_image):
+        product = product_image.product
+        product.promotions.set(baker.make(Promotion, discount=10, _quantity=2))
+
+        response = api_client.get(URL)
+        expected = ProductSerializer(
+            Product.objects.get(id=product.id),
+            context={"request": response.wsgi_request},
+        ).data
+
+        assert list(response.data["results"][0].items()) == list(expected.items())
+
+    def test_cursor_pagination_previous_link_returns_previous_page(
+        self, api_client, collection
+    ):
+        baker.make(Product, collection=collection, unit_price=10, _quantity=5)
+        first_page = api_client.get(URL + "?pagination=cursor&page_size=2")
+        second_page = api_client.get(first_page.data["next"])
+
+        response = api_client.get(second_page.data["previous"])
+
+        assert response.data["results"] == first_page.data["results"]
+
+    def test_if_cursor_is_invalid_returns_404(self, api_client):
+        response = api_client.get(URL + "?cursor=invalid")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        "ordering, position",
+        [
+            ("unit_price", ["abc", 1]),
+            ("-last_update", ["yesterday", 1]),
+            ("final_price", [None, 1]),
+            ("title", ["title", "abc"]),
+            ("likes_count", [{}, 1]),
+        ],
+    )
+    def test_if_cursor_position_is_tampered_returns_404(
+        self, api_client, ordering, position
+    ):
+        data = json.dumps({"p": position, "r": 0}).encode()
+        cursor = urlsafe_b64encode(data).decode()
+
+        response = api_client.get(URL + f"?ordering={ordering}&cursor={cursor}")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestSparseFieldsProducts:
+    def test_fields_limits_response_to_requested_fields(self, api_client, product):
+        response = api_client.get(URL + "?fields=id,title,slug,unit_price")
+        results = response.data["results"]
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(results[0]) == {"id", "title", "slug", "unit_price"}
+
+    def test_expand_adds_only_requested_relations(self, api_client, product):
+        response = api_client.get(URL + "?expand=collection")
+        result = response.data["results"][0]
+
+        assert result["collection"]["id"] == product.collection.id
+        assert "promotions" not in result
+        assert "images" not in result
+        assert "title" in result
+
+    def test_fields_and_expand_work_on_retrieve(self, api_client, product):
+        response = api_client.get(URL + f"{product.slug}/?fields=id&expand=images")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"id": product.id, "images": []}
+
+    def test_lean_list_runs_a_single_narrow_query(
+        self, api_client, product, django_assert_num_queries
+    ):
+        # the planner estimate, the page count, the id page and its products
+        with django_assert_num_queries(4) as context:
+            api_client.get(URL + "?fields=id,title,slug,unit_price")
+
+        for query in context.captured_queries[-2:]:
+            assert "JOIN" not in query["sql"]
+            assert '"products_product"."description"' not in query["sql"]
+
+    def test_if_field_is_unknown_returns_400(self, api_client):
+        response = api_client.get(URL + "?fields=id,secret&expand=votes")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "fields" in response.data
+        assert "expand" in response.data
+
+
+@pytest.mark.django_db
+class TestSearchProducts:
+    def test_search_matches_title_description_and_collection(self, api_client):
+        collection = baker.make(Collection, title="Bakery")
+        baker.make(Product, title="Sourdough bread", collection=collection)
+        baker.make(Product, title="Cake", description="fresh baked chocolate cake")
+        baker.make(Product, title="Pencil")
+
+        title_response = api_client.get(URL + "?search=bread")
+        description_response = api_client.get(URL + "?search=chocolate")
+        collection_response = api_client.get(URL + "?search=bakery")
+
+        assert [p["title"] for p in title_response.data["results"]] == [
+            "Sourdough bread"
+        ]
+        assert [p["title"] for p in description_response.data["results"]] == ["Cake"]
+        assert [p["title"] for p in collection_response.data["results"]] == [
+            "Sourdough bread"
+        ]
+
+    def test_search_tolerates_typos(self, api_client, collection):
+        baker.make(Product, title="Strawberry jam", collection=collection)
+
+        response = api_client.get(URL + "?search=strawbery")
+
+        assert [p["title"] for p in response.data["results"]] == ["Strawberry jam"]
+
+    def test_search_ranks_title_matches_first(self, api_client, collection):
+        baker.make(Product, title="Lemonade", description="made with honey")
+        baker.make(Product, title="Honey", collection=collection)
+
+        response = api_client.get(URL + "?search=honey")
+
+        assert [p["title"] for p in response.data["results"]] == ["Honey", "Lemonade"]
+
+    def test_search_combines_with_filters_and_ordering(self, api_client, collection):
+        baker.make(Product, title="Green tea", unit_price=5, collection=collection)
+        baker.make(Product, title="Black tea", unit_price=15, collection=collection)
+        baker.make(Product, title="White tea", unit_price=25, collection=collection)
+
+        response = api_client.get(
+            URL + "?search=tea&unit_price_min=10&ordering=-unit_price"
+        )
+
+        assert [p["title"] for p in response.data["results"]] == [
+            "White tea",
+            "Black tea",
+        ]
+
+    def test_cursor_pagination_walks_search_results_once(self, api_client, collection):
+        # ranks vary per product, so cursor positions are fractional
+        products = [
+            baker.make(
+                Product,
+                title=f"Apple {'pie ' * index}",
+                description="apple " * index,
+                collection=collection,
+            )
+            for index in range(9)
+        ]
+
+        ids = []
+        url = URL + "?pagination=cursor&page_size=2&search=apple"
+        for _ in range(len(products)):
+            response = api_client.get(url)
+            ids += [result["id"] for result in response.data["results"]]
+            url = response.data["next"]
+            if url is None:
+                break
+
+        assert url is None
+        assert sorted(ids) == sorted(product.id for product in products)
+
+    def test_collection_rename_updates_search(self, api_client, product, collection):
+        collection.title = "Stationery"
+        collection.save()
+
+        response = api_client.get(URL + "?search=stationery")
+
+        assert [p["id"] for p in response.data["results"]] == [product.id]
+
+    def test_collection_save_without_rename_keeps_product_vectors(
+        self, product, collection
+    ):
+        collection.save()
+
+        with CaptureQueriesContext(connection) as context:
+            collection.save()
+
+        assert not any(
+            query["sql"].startswith('UPDATE "products_product"')
+            for query in context.captured_queries
+        )
+
+
+@pytest.mark.django_db
+class TestProductFinalPrice:
+    def test_final_price_applies_best_promotion(self, product):
+        product.unit_price = Decimal("19.99")
+        product.save()
+        product.promotions.set(
+            [baker.make(Promotion, discount=10), baker.make(Promotion, discount=25)]
+        )
+        product.refresh_from_db()
+
+        assert product.final_price == Decimal("14.99")
+
+    def test_final_price_follows_promotion_changes(self, product):
+        product.unit_price = Decimal("10.00")
+        product.save()
+        promotion = baker.make(Promotion, discount=10)
+        promotion.product_set.add(product)
+
+        promotion.discount = 50
+        promotion.save()
+        product.refresh_from_db()
+        assert product.final_price == Decimal("5.00")
+
+        promotion.delete()
+        product.refresh_from_db()
+        assert product.final_price == Decimal("10.00")
+
+    def test_final_price_is_reset_when_promotion_is_cleared(self, product):
+        product.unit_price = Decimal("10.00")
+        product.save()
+        promotion = baker.make(Promotion, discount=20)
+        promotion.product_set.add(product)
+
+        promotion.product_set.clear()
+        product.refresh_from_db()
+
+        assert product.final_price == Decimal("10.00")
+
+    def test_filter_and_ordering_by_final_price(self, api_client, collection):
+        promotion = baker.make(Promotion, discount=50)
+        cheap, discounted, expensive = baker.make(
+            Product, collection=collection, unit_price=iter([5, 30, 20]), _quantity=3
+        )
+        discounted.promotions.add(promotion)
+
+        response = api_client.get(
+            URL + "?final_price_min=10&final_price_max=20&ordering=final_price"
+        )
+        results = response.data["results"]
+
+        assert [row["id"] for row in results] == [discounted.id, expensive.id]
+        assert results[0]["final_price"] == "15.00"
+
+
+@pytest.mark.django_db
+class TestProductRatingAggregates:
+    def test_aggregates_follow_review_changes(self, product):
+        first, second = baker.make(
+            Review, product=product, rating=iter([4, 8]), _quantity=2
+        )
+        first.rating = 10
+        first.save()
+        second.delete()
+        product.refresh_from_db()
+
+        assert product.reviews_count == 1
+        assert product.rating_sum == 10
+        assert product.rating_histogram == [0] * 9 + [1]
+        assert product.average_rating == Decimal("10.00")
+
+    def test_aggregates_are_exposed_and_orderable(self, api_client, collection):
+        unrated, liked, disliked = baker.make(
+            Product, collection=collection, _quantity=3
+        )
+        baker.make(Review, product=liked, rating=iter([9, 10]), _quantity=2)
+        baker.make(Review, product=disliked, rating=2)
+
+        response = api_client.get(URL + "?ordering=-average_rating")
+        results = response.data["results"]
+
+        assert [row["id"] for row in results] == [liked.id, disliked.id, unrated.id]
+        assert results[0]["reviews_count"] == 2
+        assert results[0]["average_rating"] == "9.50"
+        assert results[0]["rating_histogram"] == [0] * 8 + [1, 1]
+        assert results[2]["average_rating"] == "0.00"
+
 
 @pytest.mark.django_db
 class TestCreateProduct:
@@ -81,6 +384,52 @@ class TestRetrieveProduct:
         assert slug_response.status_code == status.HTTP_200_OK
         assert id_response.data == slug_response.data
 
+    def test_lookup_by_slug_costs_as_many_queries_as_by_id(
+        self, api_client, product_image
+    ):
+        product = product_image.product
+
+        with CaptureQueriesContext(connection) as id_context:
+            api_client.get(URL + f"{product.id}/")
+        with CaptureQueriesContext(connection) as slug_context:
+            api_client.get(URL + f"{product.slug}/")
+
+        assert len(slug_context) == len(id_context)
+
+    def test_numeric_identifier_prefers_id_over_slug(
+        self, api_client, product, collection
+    ):
+        baker.make(Product, slug=str(product.id), collection=collection)
+
+        response = api_client.get(URL + f"{product.id}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == product.id
+
+    def test_numeric_slug_is_found_when_no_id_matches(
+        self, api_client, product, collection
+    ):
+        other_product = baker.make(
+            Product, slug=str(product.id + 1000), collection=collection
+        )
+
+        response = api_client.get(URL + f"{other_product.slug}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == other_product.id
+
+    def test_response_matches_product_serializer(self, api_client, product_image):
+        product = product_image.product
+        product.promotions.set(baker.make(Promotion, discount=10, _quantity=2))
+
+        response = api_client.get(URL + f"{product.id}/")
+        expected = ProductSerializer(
+            Product.objects.get(id=product.id),
+            context={"request": response.wsgi_request},
+        ).data
+
+        assert list(response.data.items()) == list(expected.items())
+
 
 @pytest.mark.django_db
 class TestUpdateProduct:
@@ -193,3 +542,9 @@ class TestDeleteProduct:
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
         assert not Product.objects.filter(id=product.id).exists()
+
+    def test_delete_product_by_slug_returns_204(self, product, admin_api_client):
+        response = admin_api_client.delete(URL + f"{product.slug}/")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Product.objects.filter(id=product.id).exists()
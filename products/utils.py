@@ -1,17 +1,86 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
 from rest_framework.exceptions import NotFound
 
-from products.models import Product
+from products.models import Collection, Product
+
+PRODUCT_ID_CACHE_KEY = "products:id:{}"
+PRODUCT_ID_CACHE_TIMEOUT = 60 * 60
+
+
+def get_product_id_cache_key(product_identifier: int | str) -> str:
+    # slugs may be up to 255 characters long, so they are hashed into the key
+    digest = md5(str(product_identifier).encode(), usedforsecurity=False).hexdigest()
+    return PRODUCT_ID_CACHE_KEY.format(digest)
+
+
+def get_product_id_or_404(product_identifier: int | str, request=None) -> int:
+    """
+    Resolves a product id or slug to the product's pk. Results are memoized on
+    the request and cached, so nested endpoints look the product up at most once.
+    """
+    product_identifier = str(product_identifier)
+    resolved_ids = getattr(request, "_resolved_product_ids", None)
+    if resolved_ids is None:
+        resolved_ids = {}
+        if request is not None:
+            request._resolved_product_ids = resolved_ids
+
+    if product_identifier in resolved_ids:
+        return resolved_ids[product_identifier]
+
+    cache_key = get_product_id_cache_key(product_identifier)
+    product_id = cache.get(cache_key)
+    if product_id is None:
+        product_id = lookup_product_id(product_identifier)
+        cache.set(cache_key, product_id, PRODUCT_ID_CACHE_TIMEOUT)
+
+    resolved_ids[product_identifier] = product_id
+    return product_id
+
+
+def lookup_product_id(product_identifier: str) -> int:
+    # a numeric identifier may be an id or a slug, ids take precedence
+    lookup = Q(slug=product_identifier)
+    if product_identifier.isdecimal():
+        lookup |= Q(pk=int(product_identifier))
+
+    matches = dict(Product.objects.filter(lookup).values_list("slug", "pk"))
+    if not matches:
+        raise NotFound("No %s matches the given query." % Product._meta.object_name)
+
+    if product_identifier.isdecimal() and int(product_identifier) in matches.values():
+        return int(product_identifier)
+    return matches[product_identifier]
+
+
+def invalidate_product_id_cache(*product_identifiers: int | str):
+    cache.delete_many(
+        [get_product_id_cache_key(identifier) for identifier in product_identifiers]
+    )
+
+
+def count_collection_products() -> Coalesce:
+    products = (
+        Product.objects.filter(collection_id=OuterRef("pk"))
+        .order_by()
+        .values("collection_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(products), Value(0))
 
 
-def get_product_or_404(product_identifier: int | str) -> Product:
-    try:
-        return Product.objects.get(pk=product_identifier)
-    except (Product.DoesNotExist, ValueError):
-        pass
+def rebuild_collection_products_count(queryset: QuerySet) -> int:
+    return queryset.update(products_count=count_collection_products())
 
-    try:
-        return Product.objects.get(slug=product_identifier)
-    except (Product.DoesNotExist, ValueError):
-        pass
 
-    raise NotFound("No %s matches the given query." % Product._meta.object_name)
+def update_collection_products_count(collection_id: int | None, delta: int):
+    # F() keeps concurrent product writes from overwriting each other's counts
+    collections = Collection.objects.filter(id=collection_id)
+    if delta < 0:
+        collections = collections.filter(products_count__gte=-delta)
+    collections.update(products_count=F("products_count") + delta)
@@ -1,41 +1,61 @@
-from django.db.models import Count, Q
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
+from django.db.models import Prefetch
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from core.caching import cache_response, conditional_response
 from core.exceptions import Conflict
+from core.micro_cache import micro_cache
 from products.filters import ProductFilter, ReviewFilter
-from products.mixins import MultipleFieldLookupMixin
-from products.models import Product, ProductImage, Review, Collection
+from products.mixins import MultipleFieldLookupMixin, SparseFieldsMixin
+from products.models import Product, ProductImage, Review, Collection, Promotion
 from products.permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
 from products.serializers import (
     ProductSerializer,
+    ProductValuesSerializer,
     ProductImageSerializer,
     ReviewSerializer,
     CollectionSerializer,
 )
-from products.utils import get_product_or_404
+from products.utils import get_product_id_or_404
+from products.warmup import WARMUP_HEADER, record_product_view
 from votes.models import Vote
 from votes.views import VoteView
 
 
 # Create your views here.
 class CollectionViewSet(ModelViewSet):
-    queryset = (
-        Collection.objects.prefetch_related("product_set")
-        .annotate(products_count=Count("product"))
-        .order_by("title")
-    )
+    queryset = Collection.objects.order_by("title")
     serializer_class = CollectionSerializer
     permission_classes = [IsAdminOrReadOnly]
     ordering_fields = ["title", "products_count"]
-
-    # cache responses for 10 minutes
-    @method_decorator([cache_page(60 * 10), vary_on_cookie])
-    def dispatch(self, request, *args, **kwargs):
-        return super().dispatch(request, *args, **kwargs)
+    # writes to these models invalidate cached list and retrieve responses
+    cache_dependencies = [Collection, Product]
+
+    def get_response_validators(self) -> list:
+        # lists are covered by the cache generations alone
+        if self.action == "retrieve":
+            row = self.get_queryset().filter(pk=self.kwargs["pk"])
+            return list(row.values_list("title", "products_count"))
+        return []
+
+    def get_surrogate_keys(self, response) -> list[str]:
+        if self.action == "retrieve":
+            return [f"collection-{self.kwargs['pk']}"]
+        return ["collection-list"]
+
+    @micro_cache
+    @cache_response(serve_stale=True)
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @micro_cache
+    @cache_response
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
         collection = self.get_object()
@@ -46,28 +66,96 @@ class CollectionViewSet(ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class ProductViewSet(MultipleFieldLookupMixin, ModelViewSet):
+class ProductViewSet(MultipleFieldLookupMixin, SparseFieldsMixin, ModelViewSet):
     queryset = (
         Product.objects.select_related("collection")
-        .prefetch_related("promotions", "productimage_set")
-        .annotate(
-            likes_count=Count("votes", filter=Q(votes__value=Vote.LIKE)),
-            dislikes_count=Count("votes", filter=Q(votes__value=Vote.DISLIKE)),
+        .prefetch_related(
+            Prefetch("promotions", queryset=Promotion.objects.order_by("id")),
+            Prefetch("productimage_set", queryset=ProductImage.objects.order_by("id")),
         )
         .order_by("title")
     )
     serializer_class = ProductSerializer
+    # list and retrieve render from values() rows instead of model instances
+    values_serializer_class = ProductValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
     filterset_class = ProductFilter
     lookup_fields = ["id", "slug"]
+    expandable_fields = ["collection", "promotions", "images"]
     ordering_fields = [
         "title",
         "unit_price",
+        "final_price",
         "inventory",
         "last_update",
         "likes_count",
         "dislikes_count",
+        "reviews_count",
+        "average_rating",
     ]
+    # writes to these models invalidate cached list and retrieve responses
+    cache_dependencies = [Product, Collection, Promotion, ProductImage, Review, Vote]
+
+    def get_response_validators(self) -> list:
+        # lists are covered by the cache generations alone, every writer of
+        # the cache_dependencies bumps them, counter updates included
+        if self.action == "retrieve":
+            row = self.lookup_object(
+                self.get_queryset().values(
+                    "last_update", "likes_count", "dislikes_count", "reviews_count"
+                )
+            )
+            return list(row.values())
+        return []
+
+    def get_surrogate_keys(self, response) -> list[str]:
+        if self.action != "retrieve":
+            return ["product-list"]
+
+        # the identifier from the url covers slugs and not yet existing products
+        keys = [f"product-{self.kwargs['pk']}"]
+        if response.status_code == status.HTTP_200_OK:
+            product = response.data
+            keys.append(f"product-{product['id']}")
+            if product.get("collection"):
+                keys.append(f"collection-{product['collection']['id']}")
+            keys += [
+                f"promotion-{item['id']}" for item in product.get("promotions", [])
+            ]
+        return list(dict.fromkeys(keys))
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # counted before any cache answers, drives the cache warm-up, which
+        # must not count its own requests
+        if self.action == "retrieve" and WARMUP_HEADER not in request.headers:
+            record_product_view(self.kwargs["pk"])
+
+    def get_values_serializer(self) -> ProductValuesSerializer:
+        return self.values_serializer_class(context=self.get_serializer_context())
+
+    @micro_cache
+    @cache_response(serve_stale=True)
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = serializer.get_page_queryset(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_cached_representation(page)
+            )
+        return Response(serializer.to_cached_representation(queryset))
+
+    @micro_cache
+    @cache_response
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        row = self.lookup_object(serializer.get_queryset(self.get_queryset()))
+        return Response(serializer.to_representation([row])[0])
 
 
 class ProductImageViewSet(ModelViewSet):
@@ -77,12 +165,12 @@ class ProductImageViewSet(ModelViewSet):
 
     def get_queryset(self):
         product_identifier = self.kwargs["product_pk"]
-        product = get_product_or_404(product_identifier)
-        return ProductImage.objects.filter(product=product).order_by("id")
+        product_id = get_product_id_or_404(product_identifier, self.request)
+        return ProductImage.objects.filter(product_id=product_id).order_by("id")
 
     def create(self, request, *args, **kwargs):
         product_identifier = self.kwargs["product_pk"]
-        get_product_or_404(product_identifier)
+        get_product_id_or_404(product_identifier, request)
         return super().create(request, *args, **kwargs)
 
 
@@ -96,24 +184,22 @@ class ProductReviewViewSet(ModelViewSet):
         "likes_count",
         "dislikes_count",
     ]
+    # writes to these models invalidate cached list counts
+    count_cache_dependencies = [Review]
 
     def get_queryset(self):
         product_identifier = self.kwargs["product_pk"]
-        product = get_product_or_404(product_identifier)
+        product_id = get_product_id_or_404(product_identifier, self.request)
 
         return (
-            Review.objects.filter(product=product)
+            Review.objects.filter(product_id=product_id)
             .select_related("author")
-            .annotate(
-                likes_count=Count("votes", filter=Q(votes__value=Vote.LIKE)),
-                dislikes_count=Count("votes", filter=Q(votes__value=Vote.DISLIKE)),
-            )
             .order_by("-created_at")
         )
 
     def create(self, request, *args, **kwargs):
         product_identifier = self.kwargs["product_pk"]
-        get_product_or_404(product_identifier)
+        get_product_id_or_404(product_identifier, request)
         return super().create(request, *args, **kwargs)
 
 
@@ -121,10 +207,12 @@ class ProductVoteView(VoteView):
     content_object_queryset = Product.objects.all()
     integrity_error_message = "You have already voted on this product."
 
+    # the resolver already returns 404 for unknown products
+    check_content_object_exists = False
+
     def get_content_object_id(self, *args, **kwargs):
         product_identifier = self.kwargs["product_pk"]
-        product = get_product_or_404(product_identifier)
-        return product.id
+        return get_product_id_or_404(product_identifier, self.request)
 
 
 class ProductReviewVoteView(VoteView):
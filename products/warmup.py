@@ -0,0 +1,202 @@
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from math import ceil
+from time import monotonic, sleep
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from uuid import uuid4
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+from core.paginations import StandardSizePagination
+from products.models import Collection, Product
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DONE_CACHE_KEY = "warmup:done"
+WARMUP_LOCK_CACHE_KEY = "warmup:lock"
+# long enough for a full run, short enough to recover from a killed worker
+WARMUP_LOCK_TIMEOUT = 60 * 60
+# sent with every warm-up request, so they are not counted as product views
+WARMUP_HEADER = "X-Cache-Warmup"
+
+PRODUCT_TRAFFIC_KEY = "traffic:products:{}"
+PRODUCT_TRAFFIC_DAYS = 2
+PRODUCT_TRAFFIC_FLUSH_SIZE = 100
+product_views = Counter()
+
+_redis = None
+
+
+def get_warmup_config() -> dict:
+    return settings.CACHE_WARMUP
+
+
+def get_redis() -> redis.Redis | None:
+    global _redis
+    redis_url = get_warmup_config().get("REDIS_URL")
+    if redis_url is None:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(redis_url)
+    return _redis
+
+
+def acquire_warmup_lock() -> str | None:
+    # cache.add() is atomic, so overlapping runs do not request every url twice
+    token = uuid4().hex
+    if cache.add(WARMUP_LOCK_CACHE_KEY, token, timeout=WARMUP_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_warmup_lock(token: str):
+    if cache.get(WARMUP_LOCK_CACHE_KEY) == token:
+        cache.delete(WARMUP_LOCK_CACHE_KEY)
+
+
+def get_traffic_keys() -> list[str]:
+    # one sorted set per day, so old traffic falls out on its own
+    today = date.today()
+    return [
+        PRODUCT_TRAFFIC_KEY.format((today - timedelta(days=days)).isoformat())
+        for days in range(PRODUCT_TRAFFIC_DAYS)
+    ]
+
+
+def record_product_view(identifier: str):
+    # views are counted in the process and flushed in batches, like the
+    # local cache metrics
+    if get_redis() is None:
+        return
+    product_views[identifier] += 1
+    if product_views.total() >= PRODUCT_TRAFFIC_FLUSH_SIZE:
+        flush_product_views()
+
+
+def flush_product_views():
+    key = get_traffic_keys()[0]
+    pipeline = get_redis().pipeline(transaction=False)
+    for identifier, count in product_views.items():
+        pipeline.zincrby(key, count, identifier)
+    pipeline.expire(key, PRODUCT_TRAFFIC_DAYS * 24 * 60 * 60)
+    product_views.clear()
+    try:
+        pipeline.execute()
+    except redis.RedisError:
+        logger.exception("Could not record product views.")
+
+
+def get_top_product_identifiers(count: int) -> list[str]:
+    """
+    Returns the identifiers of the most viewed products in recent days. The
+    most reviewed products stand in while no traffic is recorded.
+    """
+    if count <= 0:
+        return []
+
+    client = get_redis()
+    if client is not None:
+        top_key = PRODUCT_TRAFFIC_KEY.format("top")
+        pipeline = client.pipeline()
+        pipeline.zunionstore(top_key, get_traffic_keys())
+        pipeline.zrevrange(top_key, 0, count - 1)
+        pipeline.delete(top_key)
+        _, identifiers, _ = pipeline.execute()
+        if identifiers:
+            return [identifier.decode() for identifier in identifiers]
+
+    product_ids = Product.objects.order_by("-reviews_count", "id").values_list(
+        "id", flat=True
+    )
+    return [str(product_id) for product_id in product_ids[:count]]
+
+
+def get_page_numbers(items_count: int, max_pages: int | None = None) -> list[int]:
+    pages = max(ceil(items_count / StandardSizePagination.page_size), 1)
+    return list(range(1, min(pages, max_pages or pages) + 1))
+
+
+def get_list_path(path: str, page: int, **params) -> str:
+    # the first page is requested without the page parameter, like clients do
+    if page > 1:
+        params["page"] = page
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def get_warmup_paths(pages: int, top_products: int) -> list[str]:
+    """
+    Lists the catalog urls to warm up: every collection page and detail, the
+    first `pages` product pages of each collection in every ordering, and
+    the `top_products` most viewed product details.
+    """
+    from products.views import ProductViewSet
+
+    collections = list(
+        Collection.objects.order_by("id").values_list("id", "products_count")
+    )
+    orderings = [None] + [
+        ordering
+        for field in ProductViewSet.ordering_fields
+        for ordering in [field, f"-{field}"]
+    ]
+
+    paths = [
+        get_list_path("/api/collections/", page)
+        for page in get_page_numbers(len(collections))
+    ]
+    paths += [f"/api/collections/{collection_id}/" for collection_id, _ in collections]
+    for collection_id, products_count in collections:
+        for ordering in orderings:
+            params = {"collection": collection_id}
+            if ordering is not None:
+                params["ordering"] = ordering
+            paths += [
+                get_list_path("/api/products/", page, **params)
+                for page in get_page_numbers(products_count, pages)
+            ]
+    paths += [
+        f"/api/products/{identifier}/"
+        for identifier in get_top_product_identifiers(top_products)
+    ]
+    return paths
+
+
+def fetch(url: str) -> int | None:
+    request = Request(url, headers={"Accept": "application/json", WARMUP_HEADER: "1"})
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status
+    except HTTPError as exc:
+        return exc.code
+    except URLError as exc:
+        logger.warning("Could not warm up %s: %s", url, exc)
+        return None
+
+
+def warm_up(paths: list[str], base_url: str, concurrency: int, rate: float) -> Counter:
+    """
+    Requests every path through the regular stack, so each cache tier stores
+    the responses the way real traffic would. At most `concurrency` requests
+    run at once, started no faster than `rate` per second.
+    """
+    interval = 1 / rate if rate else 0
+    lock = threading.Lock()
+    next_start = monotonic()
+
+    def throttled_fetch(path: str) -> int | None:
+        nonlocal next_start
+        with lock:
+            start = max(next_start, monotonic())
+            next_start = start + interval
+        sleep(max(start - monotonic(), 0))
+        return fetch(base_url + path)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return Counter(executor.map(throttled_fetch, paths))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from os import environ
 from pathlib import Path
 
 from celery.schedules import crontab
@@ -20,6 +21,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
+# set by every environment, read here only for build steps run on these
+# settings, like the schema build in Dockerfile.prod
+SECRET_KEY = environ.get("SECRET_KEY")
 
 # Application definition
 
@@ -30,6 +34,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "django_admin_inline_paginator",
     "corsheaders",
@@ -114,6 +119,11 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
 
+# the schema is rendered at image build time for this version, usually the
+# git commit, see core.schema and Dockerfile.prod
+CODE_VERSION = environ.get("CODE_VERSION") or None
+OPENAPI_SCHEMA_DIR = BASE_DIR / "openapi"
+
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -132,9 +142,7 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_PAGINATION_CLASS": "core.paginations.StandardSizePagination",
-    "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication"
-    ],
+    "DEFAULT_AUTHENTICATION_CLASSES": ["core.authentication.CachedJWTAuthentication"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -161,7 +169,29 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(
             minute="0", hour="0", day_of_month="*", month_of_year="*", day_of_week="1"
         ),
-    }
+    },
+    "warm_up_catalog_cache": {
+        "task": "products.tasks.warm_up_catalog_cache",
+        # only does work when the cache has been emptied, see the task
+        "schedule": crontab(minute="*/5"),
+    },
+}
+
+# keeps active carts in redis instead of the database, see orders.carts
+CART_STORE = None
+
+# catalog cache warm-up, see products.warmup
+CACHE_WARMUP = {
+    "BASE_URL": "http://localhost:8000",
+    # product pages per collection and ordering
+    "PAGES": 2,
+    "TOP_PRODUCTS": 100,
+    "CONCURRENCY": 4,
+    # requests started per second
+    "RATE": 20,
+    # product views are recorded here, the most reviewed products are used
+    # without it
+    "REDIS_URL": None,
 }
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
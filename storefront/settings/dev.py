@@ -38,6 +38,19 @@ CACHES = {
     }
 }
 
+# per-process cache in front of redis, see core.local_cache
+LOCAL_CACHE = {
+    "MAX_BYTES": 32 * 1024 * 1024,
+    "TIMEOUT": 30,
+    "REDIS_URL": "redis://redis:6379",
+}
+
+CACHE_WARMUP = {
+    **CACHE_WARMUP,  # noqa: F405
+    "BASE_URL": "http://backend:8000",
+    "REDIS_URL": "redis://redis:6379",
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=365),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=365),
@@ -22,6 +22,35 @@ CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND_URL")
 
 CACHES = {"default": env.cache()}
 
+# per-process cache in front of redis, see core.local_cache
+LOCAL_CACHE = {
+    "MAX_BYTES": 32 * 1024 * 1024,
+    "TIMEOUT": 30,
+    "REDIS_URL": CACHES["default"]["LOCATION"],
+}
+
+# anonymous catalog responses cached by nginx, see core.micro_cache
+MICRO_CACHE = {
+    "TIMEOUT": 60,
+    "PURGE_URL": env("MICRO_CACHE_PURGE_URL", default="http://nginx"),
+    "PURGE_TOKEN": env("CACHE_PURGE_TOKEN"),
+    "REDIS_URL": CACHES["default"]["LOCATION"],
+}
+
+if env.bool("REDIS_CARTS", default=False):
+    CART_STORE = {
+        "REDIS_URL": CACHES["default"]["LOCATION"],
+        # abandoned carts expire after a month, like remove_unused_carts
+        "TIMEOUT": 30 * 24 * 60 * 60,
+    }
+
+# warmed up through nginx, so the micro-cache is filled too
+CACHE_WARMUP = {
+    **CACHE_WARMUP,  # noqa: F405
+    "BASE_URL": env("CACHE_WARMUP_BASE_URL", default="http://nginx"),
+    "REDIS_URL": CACHES["default"]["LOCATION"],
+}
+
 EMAIL_CONFIG = env.email()
 vars().update(EMAIL_CONFIG)
 
@@ -19,18 +19,16 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from core.views import ResponseCacheMetricsView, StaticSchemaView
 
 admin.site.site_header = "Storefront Admin"
 admin.site.index_title = "Admin"
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("schema/", StaticSchemaView.as_view(), name="schema"),
     path(
         "schema/swagger-ui/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -49,6 +47,11 @@ urlpatterns = [
                 path("", include("orders.urls")),
                 path("auth/", include("djoser.urls")),
                 path("auth/", include("djoser.urls.jwt")),
+                path(
+                    "metrics/cache/",
+                    ResponseCacheMetricsView.as_view(),
+                    name="response-cache-metrics",
+                ),
             ]
         ),
     ),
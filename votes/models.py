@@ -11,6 +11,9 @@ class Vote(models.Model):
 
     VOTES = ((DISLIKE, "Dislike"), (LIKE, "Like"))
 
+    # denormalized counter column on the voted model for each vote value
+    COUNTER_FIELDS = {DISLIKE: "dislikes_count", LIKE: "likes_count"}
+
     value = models.SmallIntegerField(verbose_name="Like/Dislike", choices=VOTES)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True
@@ -0,0 +1,27 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import QuerySet, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from votes.models import Vote
+
+
+def count_votes(content_type: ContentType, value: int) -> Coalesce:
+    votes = (
+        Vote.objects.filter(
+            content_type=content_type, object_id=OuterRef("pk"), value=value
+        )
+        .order_by()
+        .values("object_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(votes), Value(0))
+
+
+def rebuild_vote_counters(queryset: QuerySet) -> int:
+    content_type = ContentType.objects.get_for_model(queryset.model)
+    counters = {
+        field: count_votes(content_type, value)
+        for value, field in Vote.COUNTER_FIELDS.items()
+    }
+    return queryset.update(**counters)
@@ -1,6 +1,6 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db import IntegrityError
-from django.db.models import QuerySet
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet, F
 from rest_framework import status
 from rest_framework.generics import get_object_or_404, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -16,6 +16,8 @@ from votes.serializers import VoteSerializer
 class VoteView(RetrieveUpdateDestroyAPIView):
     content_object_queryset: QuerySet | None = None
     integrity_error_message: str | None = None
+    # disable when get_content_object_id() already guarantees the object exists
+    check_content_object_exists = True
 
     http_method_names = ["get", "post", "put", "delete", "head", "options", "trace"]
     queryset = Vote.objects.all()
@@ -47,6 +49,45 @@ class VoteView(RetrieveUpdateDestroyAPIView):
             user=self.request.user,
         )
 
+    def update_vote_counters(
+        self, content_object_id, added: int | None = None, removed: int | None = None
+    ):
+        if added == removed:
+            return
+
+        counters = {}
+        if added is not None:
+            field = Vote.COUNTER_FIELDS[added]
+            counters[field] = F(field) + 1
+        if removed is not None:
+            field = Vote.COUNTER_FIELDS[removed]
+            counters[field] = F(field) - 1
+
+        self.content_object_queryset.filter(pk=content_object_id).update(**counters)
+
+    def lock_object(self, instance: Vote) -> Vote:
+        # re-read under a row lock, concurrent writes of the vote wait for this
+        # transaction and move the counters from the value it leaves behind;
+        # a vote deleted in the meantime is a 404, not a second decrement
+        return get_object_or_404(
+            self.get_queryset().select_for_update(), pk=instance.pk
+        )
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.instance = self.lock_object(serializer.instance)
+            old_value = serializer.instance.value
+            vote = serializer.save()
+            self.update_vote_counters(
+                vote.object_id, added=vote.value, removed=old_value
+            )
+
+    def perform_destroy(self, instance: Vote):
+        with transaction.atomic():
+            vote = self.lock_object(instance)
+            vote.delete()
+            self.update_vote_counters(vote.object_id, removed=vote.value)
+
     @staticmethod
     def get_success_headers(data):
         try:
@@ -56,19 +97,26 @@ class VoteView(RetrieveUpdateDestroyAPIView):
 
     def post(self, request, *args, **kwargs):
         content_object_id = self.get_content_object_id()
-        content_object = get_object_or_404(
-            self.content_object_queryset, pk=content_object_id
+        if self.check_content_object_exists:
+            get_object_or_404(
+                self.content_object_queryset.only("pk"), pk=content_object_id
+            )
+        content_type = ContentType.objects.get_for_model(
+            self.content_object_queryset.model
         )
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            self.get_queryset().create(
-                **serializer.validated_data,
-                user=request.user,
-                content_object=content_object,
-            )
+            with transaction.atomic():
+                vote = self.get_queryset().create(
+                    **serializer.validated_data,
+                    user=request.user,
+                    content_type=content_type,
+                    object_id=content_object_id,
+                )
+                self.update_vote_counters(content_object_id, added=vote.value)
             headers = self.get_success_headers(serializer.data)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED, headers=headers